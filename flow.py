@@ -1,4 +1,4 @@
-from pocketflow import Flow
+from pocketflow import AsyncFlow
 # Import all node classes from nodes.py
 from nodes import (
     FetchRepo,
@@ -9,6 +9,7 @@ from nodes import (
     OrderChapters,
     WriteProjectOverview,
     WriteChapters,
+    GenerateDocs,
     CombineTutorial
 )
 
@@ -23,7 +24,9 @@ def create_tutorial_flow():
     analyze_relationships = AnalyzeRelationships(max_retries=5, wait=20)
     order_chapters = OrderChapters(max_retries=5, wait=20)
     write_project_overview = WriteProjectOverview(max_retries=3, wait=10)
-    write_chapters = WriteChapters(max_retries=5, wait=20) # This is a BatchNode
+    write_chapters = WriteChapters(max_retries=5, wait=20) # This is an AsyncParallelBatchNode
+    # The overview doesn't depend on the chapters, so both LLM stages run concurrently
+    generate_docs = GenerateDocs(write_project_overview, write_chapters)
     combine_tutorial = CombineTutorial()
 
     # Connect nodes in the enhanced technical documentation sequence
@@ -32,11 +35,10 @@ def create_tutorial_flow():
     identify_core >> identify_abstractions
     identify_abstractions >> analyze_relationships
     analyze_relationships >> order_chapters
-    order_chapters >> write_project_overview
-    write_project_overview >> write_chapters
-    write_chapters >> combine_tutorial
+    order_chapters >> generate_docs
+    generate_docs >> combine_tutorial
 
     # Create the flow starting with FetchRepo
-    tutorial_flow = Flow(start=fetch_repo)
+    tutorial_flow = AsyncFlow(start=fetch_repo)
 
     return tutorial_flow
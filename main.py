@@ -1,8 +1,10 @@
 import dotenv
 import os
 import argparse
+import asyncio
 # Import the function that creates the flow
 from flow import create_tutorial_flow
+from utils.llm_cache import llm_cache
 
 dotenv.load_dotenv()
 
@@ -54,6 +56,8 @@ def main():
     parser.add_argument("--language", default="english", help="Language for the generated tutorial (default: english)")
     # Add use_cache parameter to control LLM caching
     parser.add_argument("--no-cache", action="store_true", help="Disable LLM response caching (default: caching enabled)")
+    # Add batching parameter to control whether relationships and chapter order share one LLM call
+    parser.add_argument("--no-batch", action="store_true", help="Analyze relationships and order chapters in separate LLM calls (default: one batched call)")
     # Add max_abstraction_num parameter to control the number of abstractions
     parser.add_argument("--max-abstractions", type=int, default=10, help="Maximum number of abstractions to identify (default: 10)")
 
@@ -84,6 +88,9 @@ def main():
         
         # Add use_cache flag (inverse of no-cache flag)
         "use_cache": not args.no_cache,
+
+        # Add batched flag (inverse of no-batch flag)
+        "batched": not args.no_batch,
         
         # Add max_abstraction_num parameter
         "max_abstraction_num": args.max_abstractions,
@@ -104,8 +111,12 @@ def main():
     # Create the flow instance
     tutorial_flow = create_tutorial_flow()
 
-    # Run the flow
-    tutorial_flow.run(shared)
+    # Run the flow (WriteChapters fans out its LLM calls concurrently)
+    asyncio.run(tutorial_flow.run_async(shared))
+
+    if not args.no_cache:
+        metrics = llm_cache.metrics
+        print(f"LLM cache: {metrics['hits']} hits, {metrics['semantic_hits']} semantic hits, {metrics['misses']} misses")
 
 if __name__ == "__main__":
     main()
@@ -16,10 +16,12 @@ from nodes import (
     # Relationship nodes
     AnalyzeRelationships,
     OrderChapters,
+    AnalyzeAndOrder,
     
     # Output nodes
     WriteProjectOverview,
     WriteChapters,
+    GenerateDocs,
     CombineTutorial
 )
 
@@ -31,7 +33,9 @@ __all__ = [
     'IdentifyAbstractions',
     'AnalyzeRelationships',
     'OrderChapters',
+    'AnalyzeAndOrder',
     'WriteProjectOverview',
     'WriteChapters',
+    'GenerateDocs',
     'CombineTutorial'
 ]
@@ -16,12 +16,14 @@ from .analysis import (
 
 from .relationships import (
     AnalyzeRelationships,
-    OrderChapters
+    OrderChapters,
+    AnalyzeAndOrder
 )
 
 from .output import (
     WriteProjectOverview,
     WriteChapters,
+    GenerateDocs,
     CombineTutorial
 )
 
@@ -35,9 +37,11 @@ __all__ = [
     # Relationship nodes
     'AnalyzeRelationships',
     'OrderChapters',
+    'AnalyzeAndOrder',
     
     # Output nodes
     'WriteProjectOverview',
     'WriteChapters',
+    'GenerateDocs',
     'CombineTutorial'
 ] 
\ No newline at end of file
@@ -1,10 +1,141 @@
 import os
 import yaml
-from pocketflow import Node
+import asyncio
+from pocketflow import Node, AsyncNode
 from utils.crawl_github_files import crawl_github_files
 from utils.call_llm import call_llm
+from utils.call_llm_async import call_llm_async
 from utils.crawl_local_files import crawl_local_files
-from utils.analyze_file_structure import analyze_file_structure
+from utils.analyze_file_structure import analyze_file_structure_cached, structure_for_prompt
+from utils.stable_json import stable_json
+from utils.llm_yaml import YamlLoader, extract_yaml
+
+# Prompt templates are module-level constants filled with str.format_map, so the
+# static text is built once and stays byte-identical across calls.
+STRUCTURE_PROMPT_TEMPLATE = """
+Analyze the structure of the codebase '{project_name}':
+
+{summary_context}
+
+Based on this structural analysis, provide insights about:
+1. The overall architecture and organization
+2. Key architectural patterns detected
+3. Most important directories/modules
+4. Entry points and core components
+5. Technology stack and framework usage
+
+Format as YAML:
+
+```yaml
+architecture:
+  type: "framework/library/application/etc"
+  pattern: "mvc/layered/microservices/etc"
+  description: "Brief architectural description"
+key_directories:
+  - name: "directory_name"
+    importance: "high/medium/low"
+    purpose: "what this directory contains"
+technology_stack:
+  - "primary language/framework"
+  - "additional technologies"
+entry_points:
+  - "file paths that serve as entry points"
+core_areas:
+  - name: "area name"
+    files: ["key file paths"]
+    description: "what this area handles"
+```"""
+
+# Core file selection prompt
+CORE_FILES_PROMPT_TEMPLATE = """
+Based on the structural analysis of '{project_name}', identify the {max_core_files} most important files that best represent the core abstractions and functionality of this codebase.
+
+{context}
+
+Consider these factors:
+1. Entry points and main files
+2. Files that are heavily imported by others (high dependency centrality)
+3. Files that define key classes, interfaces, or core functionality
+4. Files that represent different architectural layers or components
+5. Configuration and setup files that define system behavior
+
+Select files that together give the best overview of how this system works.
+
+Format as YAML:
+
+```yaml
+core_files:
+  - index: 0  # Index in the files list
+    path: "path/to/file"
+    importance: "high/medium"
+    reason: "why this file is core"
+  - index: 1
+    path: "path/to/file"
+    importance: "high/medium"
+    reason: "why this file is core"
+# ... up to {max_core_files} files
+```"""
+
+# Abstraction identification prompt
+ABSTRACTIONS_PROMPT_TEMPLATE = """
+Analyze the following core files from the {project_name} project and identify 5-10 key technical abstractions/components.
+
+For each abstraction, provide:
+1. **Name**: Clear, technical component name
+2. **Primary Responsibility**: What this component is responsible for in the system
+3. **Implementation Approach**: How it's implemented (patterns, techniques, architecture)
+4. **Key Interfaces**: Important methods, APIs, or interfaces it exposes
+5. **Technical Details**: Architecture patterns, data structures, algorithms used
+6. **Dependencies**: What other components it depends on
+7. **Usage Context**: When and how other components interact with it
+
+Focus on technical depth suitable for AI development agents who need to understand implementation details.
+
+Project Structure Context:
+{structure}
+
+Core Files:
+{context}
+
+Return your analysis in YAML format:
+```yaml
+abstractions:
+  - name: "ComponentName"
+    primary_responsibility: "What this component does"
+    implementation_approach: "How it's implemented"
+    key_interfaces: "Important APIs/methods"
+    technical_details: "Architecture patterns, data structures"
+    dependencies: "Dependencies on other components"
+    usage_context: "How other components use this"
+    files: [0, 1, 2]  # indices of relevant files
+```"""
+
+# Reduce step for sharded abstraction identification
+MERGE_ABSTRACTIONS_PROMPT_TEMPLATE = """
+The following technical abstractions were identified independently from different groups of core files of the {project_name} project. Merge them into a single list of 5-10 key technical abstractions/components.
+
+- Combine entries that describe the same component, keeping the most complete details from each
+- Union the file indices of merged entries
+- If there are more than 10 distinct components, keep the most important ones
+
+Abstractions by file group:
+{partial_results}
+
+Return the merged list in YAML format:
+```yaml
+abstractions:
+  - name: "ComponentName"
+    primary_responsibility: "What this component does"
+    implementation_approach: "How it's implemented"
+    key_interfaces: "Important APIs/methods"
+    technical_details: "Architecture patterns, data structures"
+    dependencies: "Dependencies on other components"
+    usage_context: "How other components use this"
+    files: [0, 1, 2]  # indices of relevant files
+```"""
+
+# Maximum number of core files analyzed per IdentifyAbstractions LLM call
+ABSTRACTION_SHARD_SIZE = 5
 
 
 class FetchRepo(Node):
@@ -78,61 +209,32 @@ class AnalyzeStructure(Node):
         project_name = shared["project_name"]
         use_cache = shared.get("use_cache", True)
         
-        # Convert files list to dict for structure analysis
-        files_dict = {path: content for path, content in files_data}
-        
-        return files_dict, project_name, use_cache
+        return files_data, project_name, use_cache
     
     def exec(self, prep_res):
-        files_dict, project_name, use_cache = prep_res
+        files_data, project_name, use_cache = prep_res
         print(f"Analyzing codebase structure for {project_name}...")
         
-        # Use the structure analysis utility
-        structure = analyze_file_structure(files_dict)
+        # Use the structure analysis utility on the (path, content) list directly,
+        # reusing the previous result when no file has changed
+        structure = analyze_file_structure_cached(files_data, use_cache=use_cache)
         
         # Create lightweight summary for LLM analysis
         summary_context = self._create_structure_summary(structure)
         
         # Use LLM for high-level architectural understanding
-        prompt = f"""
-Analyze the structure of the codebase '{project_name}':
-
-{summary_context}
-
-Based on this structural analysis, provide insights about:
-1. The overall architecture and organization
-2. Key architectural patterns detected
-3. Most important directories/modules
-4. Entry points and core components
-5. Technology stack and framework usage
-
-Format as YAML:
-
-```yaml
-architecture:
-  type: "framework/library/application/etc"
-  pattern: "mvc/layered/microservices/etc"
-  description: "Brief architectural description"
-key_directories:
-  - name: "directory_name"
-    importance: "high/medium/low"
-    purpose: "what this directory contains"
-technology_stack:
-  - "primary language/framework"
-  - "additional technologies"
-entry_points:
-  - "file paths that serve as entry points"
-core_areas:
-  - name: "area name"
-    files: ["key file paths"]
-    description: "what this area handles"
-```"""
+        prompt = STRUCTURE_PROMPT_TEMPLATE.format_map({
+            "project_name": project_name,
+            "summary_context": summary_context,
+        })
         
         response = call_llm(prompt, use_cache=(use_cache and self.cur_retry == 0))
         
         # Parse LLM response
-        yaml_str = response.strip().split("```yaml")[1].split("```")[0].strip()
-        llm_analysis = yaml.safe_load(yaml_str)
+        yaml_str = extract_yaml(response)
+        llm_analysis = yaml.load(yaml_str, Loader=YamlLoader)
+        if not isinstance(llm_analysis, dict):
+            raise ValueError("Invalid response format - expected a YAML mapping")
         
         # Combine structure analysis with LLM insights
         structure["llm_analysis"] = llm_analysis
@@ -147,7 +249,7 @@ core_areas:
         """Create a lightweight summary of structure for LLM analysis."""
         summary = f"""
 File Structure Summary:
-- Total files: {len(structure['file_info'])}
+- Total files: {len(structure['file_info']['path'])}
 - File types: {dict(structure['file_types'])}
 - Directory depth: {structure['directory_structure'].get('depth', 0)}
 - Main directories: {structure['directory_structure'].get('common_dirs', [])}
@@ -187,40 +289,17 @@ class IdentifyCore(Node):
         # Create context with structural information
         context = self._create_core_selection_context(structure, files_data)
         
-        prompt = f"""
-Based on the structural analysis of '{project_name}', identify the {max_core_files} most important files that best represent the core abstractions and functionality of this codebase.
-
-{context}
-
-Consider these factors:
-1. Entry points and main files
-2. Files that are heavily imported by others (high dependency centrality)
-3. Files that define key classes, interfaces, or core functionality
-4. Files that represent different architectural layers or components
-5. Configuration and setup files that define system behavior
-
-Select files that together give the best overview of how this system works.
-
-Format as YAML:
-
-```yaml
-core_files:
-  - index: 0  # Index in the files list
-    path: "path/to/file"
-    importance: "high/medium"
-    reason: "why this file is core"
-  - index: 1
-    path: "path/to/file"
-    importance: "high/medium"
-    reason: "why this file is core"
-# ... up to {max_core_files} files
-```"""
+        prompt = CORE_FILES_PROMPT_TEMPLATE.format_map({
+            "project_name": project_name,
+            "max_core_files": max_core_files,
+            "context": context,
+        })
         
         response = call_llm(prompt, use_cache=(use_cache and self.cur_retry == 0))
         
         # Parse and validate response
-        yaml_str = response.strip().split("```yaml")[1].split("```")[0].strip()
-        core_selection = yaml.safe_load(yaml_str)
+        yaml_str = extract_yaml(response)
+        core_selection = yaml.load(yaml_str, Loader=YamlLoader)
         
         if not isinstance(core_selection, dict) or "core_files" not in core_selection:
             raise ValueError("LLM response missing core_files")
@@ -242,16 +321,15 @@ core_files:
     
     def _create_core_selection_context(self, structure, files_data):
         """Create context for core file selection."""
-        # List all files with indices
-        file_listing = []
-        for i, (path, content) in enumerate(files_data):
-            size = len(content)
-            lines = len(content.splitlines())
-            file_listing.append(f"{i}: {path} ({size} bytes, {lines} lines)")
+        # List all files with indices; count newlines instead of splitting to avoid a list per file
+        file_listing = "\n".join(
+            f"{i}: {path} ({len(content)} bytes, {content.count(chr(10)) + (bool(content) and not content.endswith(chr(10)))} lines)"
+            for i, (path, content) in enumerate(files_data)
+        )
         
         context = f"""
 All Files (with indices):
-{chr(10).join(file_listing)}
+{file_listing}
 
 Entry Points:
 {chr(10).join(f"- {ep}" for ep in structure.get('entry_points', []))}
@@ -268,64 +346,81 @@ Key Areas:
         return context
 
 
-class IdentifyAbstractions(Node):
-    """Analyzes core files to identify key technical abstractions."""
+class IdentifyAbstractions(AsyncNode):
+    """Analyzes core files to identify key technical abstractions.
+
+    Core files are split into shards of ABSTRACTION_SHARD_SIZE that are analyzed
+    concurrently; when there is more than one shard, a final LLM call merges and
+    deduplicates the partial results.
+    """
     
-    def prep(self, shared):
+    async def prep_async(self, shared):
         # Read core file indices and extract their content
         core_files = shared.get("core_files", [])
         files = shared["files"]
         
-        # Create focused context with only core files
+        # Create focused context entries with only core files, labelled with their
+        # global index so abstractions from any shard reference the right files
         core_content = []
         for idx in core_files:
             if idx < len(files):
                 file_path, file_content = files[idx]
-                core_content.append(f"File: {file_path}\n{file_content}")
+                core_content.append((file_path, f"File (index {idx}): {file_path}\n{file_content}"))
         
-        context = "\n\n---\n\n".join(core_content)
-        return context, shared.get("structure", {}), shared.get("project_name", "Unknown Project")
+        # AsyncNode does not set cur_retry, so count attempts here to skip the cache on retries
+        self.attempt = 0
+        use_cache = shared.get("use_cache", True)
+        return core_content, shared.get("structure", {}), shared.get("project_name", "Unknown Project"), use_cache
 
-    def exec(self, prep_res):
-        context, structure, project_name = prep_res
+    async def exec_async(self, prep_res):
+        core_content, structure, project_name, use_cache = prep_res
+        use_cache = use_cache and self.attempt == 0
+        self.attempt += 1
         
-        prompt = f"""
-Analyze the following core files from the {project_name} project and identify 5-10 key technical abstractions/components.
-
-For each abstraction, provide:
-1. **Name**: Clear, technical component name
-2. **Primary Responsibility**: What this component is responsible for in the system
-3. **Implementation Approach**: How it's implemented (patterns, techniques, architecture)
-4. **Key Interfaces**: Important methods, APIs, or interfaces it exposes
-5. **Technical Details**: Architecture patterns, data structures, algorithms used
-6. **Dependencies**: What other components it depends on
-7. **Usage Context**: When and how other components interact with it
-
-Focus on technical depth suitable for AI development agents who need to understand implementation details.
-
-Project Structure Context:
-{structure}
-
-Core Files:
-{context}
-
-Return your analysis in YAML format:
-```yaml
-abstractions:
-  - name: "ComponentName"
-    primary_responsibility: "What this component does"
-    implementation_approach: "How it's implemented"
-    key_interfaces: "Important APIs/methods"
-    technical_details: "Architecture patterns, data structures"
-    dependencies: "Dependencies on other components"
-    usage_context: "How other components use this"
-    files: [0, 1, 2]  # indices of relevant files
-```"""
-
-        response = call_llm(prompt)
-        yaml_str = response.split("```yaml")[1].split("```")[0].strip()
+        shards = [
+            core_content[i:i + ABSTRACTION_SHARD_SIZE]
+            for i in range(0, len(core_content), ABSTRACTION_SHARD_SIZE)
+        ] or [[]]
+        shard_results = await asyncio.gather(*(
+            self._identify_shard(shard, structure, project_name, use_cache) for shard in shards
+        ))
         
-        result = yaml.safe_load(yaml_str)
+        if len(shard_results) == 1:
+            return shard_results[0]
+        
+        # Merge-reduce the per-shard abstractions into one deduplicated list
+        partial_results = "\n\n".join(
+            f"Group {i + 1}:\n" + yaml.safe_dump(
+                {"abstractions": result}, sort_keys=False, allow_unicode=True, default_flow_style=None
+            ).rstrip()
+            for i, result in enumerate(shard_results)
+        )
+        prompt = MERGE_ABSTRACTIONS_PROMPT_TEMPLATE.format_map({
+            "project_name": project_name,
+            "partial_results": partial_results,
+        })
+        return self._parse_abstractions(await call_llm_async(prompt, use_cache=use_cache))
+
+    async def post_async(self, shared, prep_res, exec_res):
+        shared["abstractions"] = exec_res
+        return "default"
+    
+    async def _identify_shard(self, shard, structure, project_name, use_cache):
+        """Identify abstractions in one group of (path, labelled content) core files."""
+        # Each shard only sees the structure summary around its own files
+        shard_structure = structure_for_prompt(structure, paths=[path for path, _ in shard])
+        prompt = ABSTRACTIONS_PROMPT_TEMPLATE.format_map({
+            "project_name": project_name,
+            "structure": stable_json(shard_structure),
+            "context": "\n\n---\n\n".join(text for _, text in shard),
+        })
+        return self._parse_abstractions(await call_llm_async(prompt, use_cache=use_cache))
+    
+    def _parse_abstractions(self, response):
+        """Parse and validate the abstractions YAML from an LLM response."""
+        yaml_str = extract_yaml(response)
+        
+        result = yaml.load(yaml_str, Loader=YamlLoader)
         
         # Validate and ensure we have abstractions
         if not isinstance(result, dict) or "abstractions" not in result:
@@ -336,7 +431,3 @@ abstractions:
             raise ValueError("No abstractions identified")
         
         return abstractions
-
-    def post(self, shared, prep_res, exec_res):
-        shared["abstractions"] = exec_res
-        return "default" 
\ No newline at end of file
@@ -1,12 +1,226 @@
 import os
-from pocketflow import Node, BatchNode
-from utils.call_llm import call_llm
+import re
+import ast
+import asyncio
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from pocketflow import Node, AsyncNode, AsyncParallelBatchNode
+from utils.call_llm_async import call_llm_async
+from utils.analyze_file_structure import structure_for_prompt
+from utils.stable_json import stable_json
 
+# Static instructions are sent as the system prompt and kept byte-identical across
+# calls so providers can reuse the cached prefix; per-call data goes last.
+OVERVIEW_SYSTEM_PROMPT = """
+Generate a comprehensive project overview document for the project described by the user, specifically designed for AI development agents. This will be included in AI agent system prompts to provide complete project context.
 
-class WriteProjectOverview(Node):
+Create a comprehensive overview covering:
+
+1. **Project Purpose & Scope**: What the project does and its technical objectives
+2. **Architecture Overview**: High-level architecture, design patterns, and technical approach
+3. **Core Components**: Summary of main components and their roles
+4. **Technology Stack**: Languages, frameworks, libraries, and tools used
+5. **Development Patterns**: Coding patterns, conventions, and architectural decisions
+6. **Component Interactions**: How components work together technically
+7. **Key Interfaces & APIs**: Important interfaces for development
+8. **Development Guidelines**: Technical guidelines for implementing new features
+9. **Navigation Guide**: How AI agents should navigate the codebase for different tasks
+10. **Extension Points**: Where and how new features should be added
+
+Format as a comprehensive technical document suitable for AI agent system prompts. Use clear technical language and provide specific guidance for development tasks.
+"""
+
+CHAPTER_SYSTEM_PROMPT = """
+Write comprehensive technical documentation for the component described by the user. This documentation is for AI development agents who need to understand implementation details for feature development.
+
+Generate comprehensive documentation including:
+
+1. **Component Overview**: Technical summary and architectural role
+2. **Implementation Details**: How it's implemented, patterns used, data structures
+3. **API Reference**: Key methods, functions, interfaces with usage examples
+4. **Architecture Integration**: How it fits into the overall system architecture
+5. **Data Structures**: Important data types, models, schemas used
+6. **Usage Patterns**: Common usage patterns and examples
+7. **Dependencies & Relationships**: Technical dependencies and interaction patterns
+8. **Extension Points**: How to extend or modify this component
+9. **Performance Considerations**: Performance characteristics and optimization notes
+10. **Development Guidelines**: Best practices for working with this component
+
+Use technical language appropriate for AI development agents. Include code examples where relevant. Focus on implementation details that would be needed for feature development.
+
+Format as markdown with clear headings and technical depth.
+"""
+
+# Per-call user content, appended after the static system prompt
+OVERVIEW_PROMPT_TEMPLATE = """
+Project: {project_name}
+
+Project Structure:
+{structure}
+
+Core Components:
+{components_text}
+
+Relationships Analysis:
+{relationships}
+
+File Types: {file_types}
+"""
+
+
+# Per-chapter user content; abstraction fields are looked up by format_map
+CHAPTER_PROMPT_TEMPLATE = """
+Component Information:
+- **Name**: {abstraction[name]}
+- **Primary Responsibility**: {abstraction[primary_responsibility]}
+- **Implementation Approach**: {abstraction[implementation_approach]}
+- **Key Interfaces**: {abstraction[key_interfaces]}
+- **Technical Details**: {abstraction[technical_details]}
+- **Dependencies**: {abstraction[dependencies]}
+- **Usage Context**: {abstraction[usage_context]}
+
+Related Components:
+{related_text}
+
+Source Code:
+{files_content}
+"""
+
+# What a chapter is about, embedded for the semantic cache tier
+CHAPTER_SEMANTIC_TEMPLATE = """{abstraction[name]}: {abstraction[primary_responsibility]}
+Interfaces: {abstraction[key_interfaces]}
+Files: {file_paths}"""
+
+# Source context limits for chapter prompts (in characters)
+MAX_FILE_CHARS = 8_000
+MAX_CHAPTER_CHARS = 32_000
+
+_IDENTIFIER_RE = re.compile(r"[A-Za-z_][A-Za-z0-9_]{2,}")
+
+# Words that appear in prose descriptions and in code of most languages; matching lines
+# on them would select nearly every line of a file
+_COMMON_WORDS = frozenset("""
+    the and for with from that this into are was were has have not but all any can its
+    via per each when then than only also use uses used using based handles provides
+    class def function func return import export const let var new self this public
+    private protected static void int str string bool true false none null nil type
+    interface struct package module async await try except catch finally raise throw
+""".split())
+
+# Line-comment prefix used for the omission markers, by file extension
+_HASH_COMMENT_EXTS = (".py", ".pyi", ".pyx", ".rb", ".sh", ".yaml", ".yml", ".toml", ".cfg", ".ini")
+_SLASH_COMMENT_EXTS = (".js", ".jsx", ".ts", ".tsx", ".go", ".java", ".c", ".h", ".cpp", ".cc",
+                       ".cxx", ".hpp", ".cs", ".rs", ".swift", ".kt", ".php", ".scala")
+
+# \w matches str.isalnum() characters plus "_", so this keeps alphanumerics, "-" and "_"
+_UNSAFE_FILENAME_CHARS = re.compile(r"[^\w-]")
+
+
+def _omission_marker(file_path, note=""):
+    """An "omitted code" line written as a comment in the file's own language."""
+    if file_path.endswith(_HASH_COMMENT_EXTS):
+        prefix = "# "
+    elif file_path.endswith(_SLASH_COMMENT_EXTS):
+        prefix = "// "
+    else:
+        prefix = ""
+    return f"{prefix}...{note}"
+
+
+def _extract_relevant_span(file_path, content, abstraction, max_chars=MAX_FILE_CHARS):
+    """Reduce a file to the parts relevant to an abstraction, capped at max_chars.
+
+    Small files are returned unchanged. For Python, keeps top-level functions and
+    classes whose name (or method names) are mentioned in the abstraction's name,
+    key interfaces or technical details; for other languages, keeps windows of
+    lines around identifiers from the name and key interfaces. When the spans
+    exceed the cap, the best-matching ones (mentions of the abstraction's own
+    name count double) are kept. Falls back to the head of the file.
+    """
+    if len(content) <= max_chars:
+        return content
+
+    name_words = set(_IDENTIFIER_RE.findall(str(abstraction.get("name", ""))))
+    lines = content.splitlines()
+    spans = []  # (score, start, end)
+
+    def score(hits):
+        return len(hits) + len(hits & name_words)
+
+    if file_path.endswith((".py", ".pyi")):
+        mentioned = set(_IDENTIFIER_RE.findall(" ".join(
+            str(abstraction.get(key, "")) for key in ("name", "key_interfaces", "technical_details")
+        )))
+        try:
+            tree = ast.parse(content)
+        except SyntaxError:
+            tree = None
+        for node in (tree.body if tree else []):
+            if not isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                continue
+            names = {node.name}
+            if isinstance(node, ast.ClassDef):
+                names.update(n.name for n in node.body if isinstance(n, (ast.FunctionDef, ast.AsyncFunctionDef)))
+            hits = names & mentioned
+            if hits:
+                start = min([node.lineno] + [d.lineno for d in node.decorator_list]) - 1
+                spans.append((score(hits), start, node.end_lineno))
+    else:
+        # Prose fields like technical_details would match almost every line here
+        mentioned = {
+            word for word in _IDENTIFIER_RE.findall(" ".join(
+                str(abstraction.get(key, "")) for key in ("name", "key_interfaces")
+            ))
+            if word.lower() not in _COMMON_WORDS
+        }
+        if mentioned:
+            pattern = re.compile(r"\b(?:" + "|".join(map(re.escape, sorted(mentioned))) + r")\b")
+            for i, line in enumerate(lines):
+                hits = set(pattern.findall(line))
+                if hits:
+                    spans.append((score(hits), max(0, i - 5), min(len(lines), i + 20)))
+
+    if not spans:
+        return content[:max_chars] + "\n" + _omission_marker(file_path, " (truncated)")
+
+    # Take the best-scoring spans that fit the budget (earlier ones win ties), counting
+    # only lines not already covered by a selected span
+    selected, covered, used = [], set(), 0
+    for _, start, end in sorted(spans, key=lambda span: (-span[0], span[1])):
+        new_lines = [i for i in range(start, end) if i not in covered]
+        size = sum(len(lines[i]) + 1 for i in new_lines)
+        if used + size > max_chars and selected:
+            continue
+        # The best span is always kept, even if it alone exceeds the budget
+        selected.append((start, end))
+        covered.update(new_lines)
+        used += size
+
+    # Merge overlapping spans and stitch them together in file order
+    merged = []
+    for start, end in sorted(selected):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    separator = "\n" + _omission_marker(file_path) + "\n"
+    excerpt = separator.join("\n".join(lines[start:end]) for start, end in merged)
+    if len(excerpt) > max_chars:
+        excerpt = excerpt[:max_chars] + "\n" + _omission_marker(file_path, " (truncated)")
+    return excerpt
+
+
+def _write_utf8(path, text):
+    """Encode once and write the bytes in a single call, bypassing the text-mode codec layer."""
+    data = text.encode("utf-8")
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+class WriteProjectOverview(AsyncNode):
     """Generates comprehensive project overview for AI agent system prompts."""
     
-    def prep(self, shared):
+    async def prep_async(self, shared):
         return {
             "project_name": shared.get("project_name", "Unknown Project"),
             "structure": shared.get("structure", {}),
@@ -15,7 +229,7 @@ class WriteProjectOverview(Node):
             "files": shared.get("files", [])
         }
 
-    def exec(self, prep_res):
+    async def exec_async(self, prep_res):
         project_data = prep_res
         project_name = project_data["project_name"]
         structure = project_data["structure"]
@@ -36,70 +250,50 @@ class WriteProjectOverview(Node):
                 ext = file_path.split('.')[-1].lower()
                 file_extensions.add(ext)
         
-        prompt = f"""
-Generate a comprehensive project overview document for {project_name} specifically designed for AI development agents. This will be included in AI agent system prompts to provide complete project context.
-
-Project Structure:
-{structure}
-
-Core Components:
-{components_text}
-
-Relationships Analysis:
-{relationships}
-
-File Types: {', '.join(sorted(file_extensions))}
-
-Create a comprehensive overview covering:
+        prompt = OVERVIEW_PROMPT_TEMPLATE.format_map({
+            "project_name": project_name,
+            "structure": stable_json(structure_for_prompt(structure)),
+            "components_text": components_text,
+            "relationships": relationships,
+            "file_types": ', '.join(sorted(file_extensions)),
+        })
 
-1. **Project Purpose & Scope**: What the project does and its technical objectives
-2. **Architecture Overview**: High-level architecture, design patterns, and technical approach
-3. **Core Components**: Summary of main components and their roles
-4. **Technology Stack**: Languages, frameworks, libraries, and tools used
-5. **Development Patterns**: Coding patterns, conventions, and architectural decisions
-6. **Component Interactions**: How components work together technically
-7. **Key Interfaces & APIs**: Important interfaces for development
-8. **Development Guidelines**: Technical guidelines for implementing new features
-9. **Navigation Guide**: How AI agents should navigate the codebase for different tasks
-10. **Extension Points**: Where and how new features should be added
-
-Format as a comprehensive technical document suitable for AI agent system prompts. Use clear technical language and provide specific guidance for development tasks.
-"""
-
-        response = call_llm(prompt)
+        response = await call_llm_async(prompt, system=OVERVIEW_SYSTEM_PROMPT)
         return response
 
-    def post(self, shared, prep_res, exec_res):
+    async def post_async(self, shared, prep_res, exec_res):
         shared["project_overview"] = exec_res
         return "default"
 
 
-class WriteChapters(BatchNode):
-    """Generates detailed technical documentation for each component."""
+class WriteChapters(AsyncParallelBatchNode):
+    """Generates detailed technical documentation for each component, writing chapters concurrently."""
     
-    def prep(self, shared):
+    async def prep_async(self, shared):
         chapter_order = shared["chapter_order"]
         abstractions = shared["abstractions"]
         relationships = shared["relationships"]
         files = shared["files"]
         
-        # Prepare comprehensive context for each chapter
+        # Index relationships by component once instead of rescanning them per chapter
+        adjacency = defaultdict(list)
+        for rel in relationships.get("component_relationships", []):
+            adjacency[rel.get("from")].append(rel)
+            if rel.get("to") != rel.get("from"):
+                adjacency[rel.get("to")].append(rel)
+        
+        # Prepare comprehensive context for each chapter. Chapters reference files by
+        # index into the shared list; source blocks are only built in exec.
         chapters_to_write = []
         for order_idx in chapter_order:
             abstraction = abstractions[order_idx]
             
-            # Get related files content
-            file_contents = []
-            for file_idx in abstraction.get("files", []):
-                if file_idx < len(files):
-                    file_path, content = files[file_idx]
-                    file_contents.append(f"### {file_path}\n```\n{content}\n```")
-            
             chapter_context = {
                 "abstraction": abstraction,
                 "related_abstractions": abstractions,
-                "relationships": relationships,
-                "file_contents": file_contents,
+                "adjacency": adjacency.get(order_idx, []),
+                "files": files,
+                "file_indices": abstraction.get("files", []),
                 "abstraction_index": order_idx
             }
             chapters_to_write.append(chapter_context)
@@ -107,17 +301,28 @@ class WriteChapters(BatchNode):
         return chapters_to_write
 
     def exec(self, chapter_context):
+        # Synchronous fallback for running a single chapter outside an event loop
+        return asyncio.run(self.exec_async(chapter_context))
+
+    async def exec_async(self, chapter_context):
         abstraction = chapter_context["abstraction"]
         related_abstractions = chapter_context["related_abstractions"]
-        relationships = chapter_context["relationships"]
-        file_contents = chapter_context["file_contents"]
+        relevant_relationships = chapter_context["adjacency"]
+        files = chapter_context["files"]
         abstraction_index = chapter_context["abstraction_index"]
         
-        # Find relationships involving this component
-        relevant_relationships = []
-        for rel in relationships.get("component_relationships", []):
-            if rel.get("from") == abstraction_index or rel.get("to") == abstraction_index:
-                relevant_relationships.append(rel)
+        # Get related files content, trimmed to the relevant parts
+        file_contents = []
+        total_chars = 0
+        for file_idx in chapter_context["file_indices"]:
+            if file_idx < len(files):
+                file_path, content = files[file_idx]
+                content = _extract_relevant_span(file_path, content, abstraction)
+                if total_chars + len(content) > MAX_CHAPTER_CHARS:
+                    file_contents.append(f"### {file_path}\n(omitted: chapter source context limit reached)")
+                    continue
+                total_chars += len(content)
+                file_contents.append(f"### {file_path}\n```\n{content}\n```")
         
         # Create context about related components
         related_components_info = []
@@ -130,50 +335,49 @@ class WriteChapters(BatchNode):
         files_content = "\n\n".join(file_contents) if file_contents else "No specific files identified for this component."
         related_text = "\n".join(related_components_info) if related_components_info else "No direct relationships identified."
         
-        prompt = f"""
-Write comprehensive technical documentation for the '{abstraction['name']}' component. This documentation is for AI development agents who need to understand implementation details for feature development.
-
-Component Information:
-- **Name**: {abstraction['name']}
-- **Primary Responsibility**: {abstraction['primary_responsibility']}
-- **Implementation Approach**: {abstraction['implementation_approach']}
-- **Key Interfaces**: {abstraction['key_interfaces']}
-- **Technical Details**: {abstraction['technical_details']}
-- **Dependencies**: {abstraction['dependencies']}
-- **Usage Context**: {abstraction['usage_context']}
-
-Related Components:
-{related_text}
-
-Source Code:
-{files_content}
-
-Generate comprehensive documentation including:
-
-1. **Component Overview**: Technical summary and architectural role
-2. **Implementation Details**: How it's implemented, patterns used, data structures
-3. **API Reference**: Key methods, functions, interfaces with usage examples
-4. **Architecture Integration**: How it fits into the overall system architecture
-5. **Data Structures**: Important data types, models, schemas used
-6. **Usage Patterns**: Common usage patterns and examples
-7. **Dependencies & Relationships**: Technical dependencies and interaction patterns
-8. **Extension Points**: How to extend or modify this component
-9. **Performance Considerations**: Performance characteristics and optimization notes
-10. **Development Guidelines**: Best practices for working with this component
-
-Use technical language appropriate for AI development agents. Include code examples where relevant. Focus on implementation details that would be needed for feature development.
+        prompt = CHAPTER_PROMPT_TEMPLATE.format_map({
+            "abstraction": abstraction,
+            "related_text": related_text,
+            "files_content": files_content,
+        })
 
-Format as markdown with clear headings and technical depth.
-"""
+        # Chapters for near-identical components may share a response through the semantic
+        # cache tier; it compares a short description that fits the embedding model's window
+        semantic_text = CHAPTER_SEMANTIC_TEMPLATE.format_map({
+            "abstraction": abstraction,
+            "file_paths": ", ".join(files[i][0] for i in chapter_context["file_indices"] if i < len(files)),
+        })
 
-        response = call_llm(prompt)
+        response = await call_llm_async(prompt, system=CHAPTER_SYSTEM_PROMPT, semantic_text=semantic_text)
         return response
 
-    def post(self, shared, prep_res, exec_res_list):
+    async def post_async(self, shared, prep_res, exec_res_list):
         shared["chapters"] = exec_res_list
         return "default"
 
 
+class GenerateDocs(AsyncNode):
+    """Runs the project overview and chapter writers concurrently; they only depend on earlier stages."""
+    
+    def __init__(self, overview_node, chapters_node, max_retries=1, wait=0):
+        super().__init__(max_retries=max_retries, wait=wait)
+        self.overview_node = overview_node
+        self.chapters_node = chapters_node
+    
+    async def prep_async(self, shared):
+        return shared
+    
+    async def exec_async(self, shared):
+        # Each sub-node keeps its own retry policy and writes its own key in shared
+        await asyncio.gather(
+            self.overview_node.run_async(shared),
+            self.chapters_node.run_async(shared),
+        )
+    
+    async def post_async(self, shared, prep_res, exec_res):
+        return "default"
+
+
 class CombineTutorial(Node):
     """Assembles final documentation structure with project overview, enhanced cross-referencing, and AI agent navigation features."""
     
@@ -198,40 +402,41 @@ class CombineTutorial(Node):
         base_output_dir = prep_res["output_dir"]
         
         # Create project-specific output directory
-        safe_project_name = "".join(c if c.isalnum() or c in ('-', '_') else '_' for c in project_name)
+        safe_project_name = _UNSAFE_FILENAME_CHARS.sub("_", project_name)
         output_dir = os.path.join(base_output_dir, safe_project_name)
         os.makedirs(output_dir, exist_ok=True)
         
         # Write project overview file
         overview_path = os.path.join(output_dir, "project_overview.md")
-        with open(overview_path, "w", encoding="utf-8") as f:
-            f.write(f"# {project_name} - Development Overview\n\n")
-            f.write(project_overview)
-            f.write("\n\n---\n\nGenerated by [AI Codebase Knowledge Builder](https://github.com/The-Pocket/Tutorial-Codebase-Knowledge)")
+        _write_utf8(
+            overview_path,
+            f"# {project_name} - Development Overview\n\n{project_overview}"
+            "\n\n---\n\nGenerated by [AI Codebase Knowledge Builder](https://github.com/The-Pocket/Tutorial-Codebase-Knowledge)",
+        )
         
-        # Generate enhanced index content with technical focus
-        index_content = f"# {project_name} - Technical Documentation\n\n"
+        # Generate enhanced index content with technical focus (joined once at the end)
+        parts = [f"# {project_name} - Technical Documentation\n\n"]
         
         # Add technical summary
         if "summary" in relationships:
-            index_content += "## Technical Overview\n\n"
-            index_content += f"{relationships['summary']}\n\n"
+            parts.append("## Technical Overview\n\n")
+            parts.append(f"{relationships['summary']}\n\n")
         
         # Add architecture overview
         if "architecture_overview" in relationships:
-            index_content += "## Architecture Overview\n\n"
-            index_content += f"{relationships['architecture_overview']}\n\n"
+            parts.append("## Architecture Overview\n\n")
+            parts.append(f"{relationships['architecture_overview']}\n\n")
         
         # Create enhanced Mermaid diagram showing technical relationships
-        index_content += "## Component Architecture\n\n"
-        index_content += "```mermaid\n"
-        index_content += "graph TD\n"
+        parts.append("## Component Architecture\n\n")
+        parts.append("```mermaid\n")
+        parts.append("graph TD\n")
         
         # Add nodes for each abstraction
         for i, abstraction in enumerate(abstractions):
             node_name = f"A{i}"
             clean_name = abstraction["name"].replace('"', '\\"')
-            index_content += f'    {node_name}["{clean_name}<br/>{abstraction["primary_responsibility"][:50]}..."]\n'
+            parts.append(f'    {node_name}["{clean_name}<br/>{abstraction["primary_responsibility"][:50]}..."]\n')
         
         # Add relationships
         for rel in relationships.get("component_relationships", []):
@@ -239,49 +444,55 @@ class CombineTutorial(Node):
             to_idx = rel.get("to", 0)
             if from_idx < len(abstractions) and to_idx < len(abstractions):
                 relationship_type = rel.get("relationship_type", "relates_to")
-                index_content += f"    A{from_idx} -->|{relationship_type}| A{to_idx}\n"
+                parts.append(f"    A{from_idx} -->|{relationship_type}| A{to_idx}\n")
         
-        index_content += "```\n\n"
+        parts.append("```\n\n")
         
         # Add data flow diagram if available
         if relationships.get("data_flow"):
-            index_content += "## Data Flow\n\n"
-            index_content += "```mermaid\n"
-            index_content += "flowchart LR\n"
+            parts.append("## Data Flow\n\n")
+            parts.append("```mermaid\n")
+            parts.append("flowchart LR\n")
             for flow in relationships["data_flow"]:
                 flow_components = flow.get("components", [])
                 for i in range(len(flow_components) - 1):
                     current = flow_components[i]
                     next_comp = flow_components[i + 1]
                     if current < len(abstractions) and next_comp < len(abstractions):
-                        index_content += f"    A{current} --> A{next_comp}\n"
-            index_content += "```\n\n"
+                        parts.append(f"    A{current} --> A{next_comp}\n")
+            parts.append("```\n\n")
         
         # Add component documentation links
-        index_content += "## Component Documentation\n\n"
+        parts.append("## Component Documentation\n\n")
         chapter_files = []
         for i, order_idx in enumerate(chapter_order):
             abstraction = abstractions[order_idx]
             # Create safe filename
-            safe_name = "".join(c if c.isalnum() or c in ('-', '_') else '_' for c in abstraction["name"].lower())
+            safe_name = _UNSAFE_FILENAME_CHARS.sub("_", abstraction["name"].lower())
             chapter_filename = f"{i+1:02d}_{safe_name}.md"
             chapter_files.append((chapter_filename, chapters[i]))
             
-            index_content += f"{i+1}. **[{abstraction['name']}]({chapter_filename})** - {abstraction['primary_responsibility']}\n"
+            parts.append(f"{i+1}. **[{abstraction['name']}]({chapter_filename})** - {abstraction['primary_responsibility']}\n")
         
-        index_content += "\n\n---\n\nGenerated by [AI Codebase Knowledge Builder](https://github.com/The-Pocket/Tutorial-Codebase-Knowledge)"
+        parts.append("\n\n---\n\nGenerated by [AI Codebase Knowledge Builder](https://github.com/The-Pocket/Tutorial-Codebase-Knowledge)")
+        index_content = "".join(parts)
         
         # Write index file
         index_path = os.path.join(output_dir, "index.md")
-        with open(index_path, "w", encoding="utf-8") as f:
-            f.write(index_content)
+        _write_utf8(index_path, index_content)
         
-        # Write individual chapter files
-        for filename, content in chapter_files:
+        # Write individual chapter files in parallel (blocking I/O releases the GIL)
+        def write_chapter(chapter_file):
+            filename, content = chapter_file
             chapter_path = os.path.join(output_dir, filename)
-            with open(chapter_path, "w", encoding="utf-8") as f:
-                f.write(content)
-                f.write("\n\n---\n\nGenerated by [AI Codebase Knowledge Builder](https://github.com/The-Pocket/Tutorial-Codebase-Knowledge)")
+            _write_utf8(
+                chapter_path,
+                content + "\n\n---\n\nGenerated by [AI Codebase Knowledge Builder](https://github.com/The-Pocket/Tutorial-Codebase-Knowledge)",
+            )
+        
+        if chapter_files:
+            with ThreadPoolExecutor(max_workers=min(16, len(chapter_files))) as executor:
+                list(executor.map(write_chapter, chapter_files))
         
         return {
             "output_directory": output_dir,
@@ -1,34 +1,29 @@
+import re
+import heapq
 import yaml
 from pocketflow import Node
 from utils.call_llm import call_llm
+from utils.analyze_file_structure import structure_for_prompt
+from utils.stable_json import stable_json
+from utils.llm_yaml import YamlLoader, extract_yaml
 
+# Matches the labeled ```yaml-relationships and ```yaml-order blocks of a combined response
+_LABELED_YAML_FENCE = re.compile(r"```yaml-(relationships|order)\s*\n(.*?)```", re.DOTALL)
 
-class AnalyzeRelationships(Node):
-    """Analyzes relationships between technical components and architectural patterns."""
-    
-    def prep(self, shared):
-        abstractions = shared["abstractions"]
-        structure = shared.get("structure", {})
-        project_name = shared.get("project_name", "Unknown Project")
-        return abstractions, structure, project_name
+# Relationship and ordering responses are reused for a week on unchanged inputs
+RESPONSE_CACHE_TTL = 7 * 24 * 60 * 60
 
-    def exec(self, prep_res):
-        abstractions, structure, project_name = prep_res
-        
-        # Create abstraction summary for context
-        abstraction_list = []
-        for i, abs_info in enumerate(abstractions):
-            abstraction_list.append(f"{i}: {abs_info['name']} - {abs_info['primary_responsibility']}")
-        abstraction_context = "\n".join(abstraction_list)
-        
-        prompt = f"""
+
+# The relationship analysis request is sent alone or, in batched runs, with the
+# chapter ordering appended through {response_format}.
+RELATIONSHIPS_PROMPT_TEMPLATE = """
 Analyze the relationships between these technical components from {project_name} and provide comprehensive architectural analysis.
 
 Components:
 {abstraction_context}
 
 Structural Analysis:
-{structure}
+{structure_json}
 
 Provide:
 1. **Technical Project Summary**: Overall architecture and technical approach
@@ -36,10 +31,9 @@ Provide:
 3. **Component Relationships**: How components interact technically (dependencies, data flow, communication patterns)
 4. **Data Flow Patterns**: How data moves through the system
 5. **API Interfaces**: Key interfaces and contracts between components
+{response_format}"""
 
-Return in YAML format:
-```yaml
-summary: "Comprehensive technical project summary"
+RELATIONSHIPS_YAML_SCHEMA = """summary: "Comprehensive technical project summary"
 architecture_overview: "Architectural patterns and design decisions"
 component_relationships:
   - from: 0  # component index
@@ -57,23 +51,176 @@ api_interfaces:
     interface_name: "PublicAPI"
     methods: ["method1", "method2"]
     description: "Interface description and usage"
+"""
+
+RELATIONSHIPS_RESPONSE_FORMAT = """
+Return in YAML format:
+```yaml
+""" + RELATIONSHIPS_YAML_SCHEMA + "```"
+
+ANALYZE_AND_ORDER_RESPONSE_FORMAT = """6. **Chapter Order**: The optimal order for technical documentation, considering:
+   - Foundational components first (low-level, widely depended upon)
+   - Core business logic and main abstractions
+   - Higher-level orchestration and integration components
+   - Specialized or auxiliary components
+
+Return two labeled YAML blocks:
+```yaml-relationships
+""" + RELATIONSHIPS_YAML_SCHEMA + """```
+
+```yaml-order
+chapter_order: [2, 0, 1, 4, 3]  # Example order using component indices
+reasoning: "Brief explanation of the ordering logic"
 ```"""
 
-        response = call_llm(prompt)
-        yaml_str = response.split("```yaml")[1].split("```")[0].strip()
-        
-        result = yaml.safe_load(yaml_str)
+
+def _topological_order(count, component_relationships):
+    """
+    Kahn's algorithm over "from depends on to" edges, so depended-upon components come first.
+    Ready components are taken most-depended-upon first, then by index.
+    Returns (order, unresolved), where unresolved lists the components left in cycles.
+    """
+    edges = set()
+    for rel in component_relationships:
+        from_idx, to_idx = rel.get("from"), rel.get("to")
+        if (isinstance(from_idx, int) and isinstance(to_idx, int)
+                and 0 <= from_idx < count and 0 <= to_idx < count and from_idx != to_idx):
+            edges.add((to_idx, from_idx))
+    
+    in_degree = [0] * count
+    adj = [[] for _ in range(count)]
+    for prerequisite, dependent in edges:
+        adj[prerequisite].append(dependent)
+        in_degree[dependent] += 1
+    
+    heap = [(-len(adj[i]), i) for i in range(count) if in_degree[i] == 0]
+    heapq.heapify(heap)
+    order = []
+    while heap:
+        _, i = heapq.heappop(heap)
+        order.append(i)
+        for j in adj[i]:
+            in_degree[j] -= 1
+            if in_degree[j] == 0:
+                heapq.heappush(heap, (-len(adj[j]), j))
+    
+    unresolved = [i for i in range(count) if in_degree[i] > 0]
+    return order, unresolved
+
+
+def _complete_order(order, unresolved, chapter_order):
+    """Append the unresolved components to order, following chapter_order where it names them."""
+    pending = set(unresolved)
+    for idx in chapter_order:
+        if isinstance(idx, int) and idx in pending:
+            order.append(idx)
+            pending.discard(idx)
+    # Anything the LLM dropped follows in index order
+    order.extend(sorted(pending))
+    return order
+
+
+def _relationships_prompt(abstractions, structure, project_name, response_format):
+    abstraction_context = "\n".join(
+        f"{i}: {abs_info['name']} - {abs_info['primary_responsibility']}"
+        for i, abs_info in enumerate(abstractions)
+    )
+    return RELATIONSHIPS_PROMPT_TEMPLATE.format_map({
+        "project_name": project_name,
+        "abstraction_context": abstraction_context,
+        "structure_json": stable_json(structure_for_prompt(structure)),
+        "response_format": response_format,
+    })
+
+
+def _parse_relationships(yaml_str):
+    result = yaml.load(yaml_str, Loader=YamlLoader)
+    
+    # Validate response
+    if not isinstance(result, dict):
+        raise ValueError("Invalid response format - expected a YAML mapping")
+    required_keys = ["summary", "architecture_overview", "component_relationships"]
+    for key in required_keys:
+        if key not in result:
+            raise ValueError(f"Missing required key: {key}")
+    
+    return result
+
+
+def _analyze_and_order(abstractions, structure, project_name, use_cache):
+    """
+    Analyze relationships and order chapters with a single LLM call.
+    The dependency graph decides the order wherever it can; the LLM's suggested
+    order only places components left in cycles.
+    """
+    prompt = _relationships_prompt(abstractions, structure, project_name, ANALYZE_AND_ORDER_RESPONSE_FORMAT)
+    response = call_llm(prompt, use_cache=use_cache, cache_ttl=RESPONSE_CACHE_TTL)
+    
+    blocks = dict(_LABELED_YAML_FENCE.findall(response))
+    # A reply that ignored the labels still usually carries a plain ```yaml block
+    relationships_yaml = blocks["relationships"].strip() if "relationships" in blocks else extract_yaml(response)
+    relationships = _parse_relationships(relationships_yaml)
+    
+    component_relationships = relationships.get("component_relationships") or []
+    order, unresolved = _topological_order(len(abstractions), component_relationships)
+    if not unresolved:
+        return relationships, order
+    
+    # The suggested order is only needed to place components left in cycles
+    suggested = yaml.load(blocks["order"].strip(), Loader=YamlLoader) if "order" in blocks else None
+    if not isinstance(suggested, dict) or not isinstance(suggested.get("chapter_order"), list):
+        raise ValueError("Invalid response format - expected a yaml-order block with a chapter_order list")
+    return relationships, _complete_order(order, unresolved, suggested["chapter_order"])
+
+
+class AnalyzeAndOrder(Node):
+    """Analyzes component relationships and orders the chapters in one batched LLM call."""
+    
+    def prep(self, shared):
+        abstractions = shared["abstractions"]
+        structure = shared.get("structure", {})
+        project_name = shared.get("project_name", "Unknown Project")
+        use_cache = shared.get("use_cache", True)
+        return abstractions, structure, project_name, use_cache
+
+    def exec(self, prep_res):
+        abstractions, structure, project_name, use_cache = prep_res
+        return _analyze_and_order(abstractions, structure, project_name, use_cache and self.cur_retry == 0)
+
+    def post(self, shared, prep_res, exec_res):
+        shared["relationships"], shared["chapter_order"] = exec_res
+        print(f"Ordered {len(shared['chapter_order'])} components for documentation")
+        return "default"
+
+
+class AnalyzeRelationships(Node):
+    """Analyzes relationships between technical components and architectural patterns."""
+    
+    def prep(self, shared):
+        abstractions = shared["abstractions"]
+        structure = shared.get("structure", {})
+        project_name = shared.get("project_name", "Unknown Project")
+        use_cache = shared.get("use_cache", True)
+        batched = shared.get("batched", True)
+        return abstractions, structure, project_name, use_cache, batched
+
+    def exec(self, prep_res):
+        abstractions, structure, project_name, use_cache, batched = prep_res
+        use_cache = use_cache and self.cur_retry == 0
         
-        # Validate response
-        required_keys = ["summary", "architecture_overview", "component_relationships"]
-        for key in required_keys:
-            if key not in result:
-                raise ValueError(f"Missing required key: {key}")
+        # Batched runs also settle the chapter order, saving OrderChapters its own LLM call
+        if batched:
+            return _analyze_and_order(abstractions, structure, project_name, use_cache)
         
-        return result
+        prompt = _relationships_prompt(abstractions, structure, project_name, RELATIONSHIPS_RESPONSE_FORMAT)
+        response = call_llm(prompt, use_cache=use_cache, cache_ttl=RESPONSE_CACHE_TTL)
+        return _parse_relationships(extract_yaml(response)), None
 
     def post(self, shared, prep_res, exec_res):
-        shared["relationships"] = exec_res
+        relationships, chapter_order = exec_res
+        shared["relationships"] = relationships
+        if chapter_order is not None:
+            shared["chapter_order"] = chapter_order
         return "default"
 
 
@@ -83,22 +230,35 @@ class OrderChapters(Node):
     def prep(self, shared):
         abstractions = shared["abstractions"]
         relationships = shared.get("relationships", {})
-        return abstractions, relationships
+        use_cache = shared.get("use_cache", True)
+        # A batched AnalyzeRelationships has already ordered the chapters
+        precomputed = shared.get("chapter_order") if shared.get("batched", True) else None
+        return abstractions, relationships, use_cache, precomputed
     
     def exec(self, prep_res):
-        abstractions, relationships = prep_res
+        abstractions, relationships, use_cache, precomputed = prep_res
+        if precomputed:
+            print(f"Ordered {len(precomputed)} components for documentation")
+            return precomputed
         
-        # Create context for ordering decision
-        abstraction_list = []
-        for i, abs_info in enumerate(abstractions):
-            abstraction_list.append(f"{i}: {abs_info['name']} - {abs_info['primary_responsibility']}")
+        component_relationships = relationships.get("component_relationships") or []
+        order, unresolved = _topological_order(len(abstractions), component_relationships)
+        if not unresolved:
+            print(f"Ordered {len(order)} components for documentation from the dependency graph")
+            return order
         
-        component_relationships = relationships.get("component_relationships", [])
+        # Components caught in dependency cycles can't be ordered locally; ask the LLM
+        # to order just those, after everything the graph already placed
+        abstraction_list = [
+            f"{i}: {abstractions[i]['name']} - {abstractions[i]['primary_responsibility']}"
+            for i in unresolved
+        ]
+        pending = set(unresolved)
         relationship_context = []
         for rel in component_relationships:
             from_idx = rel.get("from", 0)
             to_idx = rel.get("to", 0)
-            if from_idx < len(abstractions) and to_idx < len(abstractions):
+            if from_idx in pending and to_idx in pending:
                 from_name = abstractions[from_idx]["name"]
                 to_name = abstractions[to_idx]["name"]
                 rel_type = rel.get("relationship_type", "relates_to")
@@ -123,17 +283,17 @@ Provide the optimal order for technical documentation, considering:
 3. Higher-level orchestration and integration components
 4. Specialized or auxiliary components
 
-Return the order as a YAML list of indices:
+Return the order as a YAML list of the component indices above:
 
 ```yaml
 chapter_order: [2, 0, 1, 4, 3]  # Example order using component indices
 reasoning: "Brief explanation of the ordering logic"
 ```"""
 
-        response = call_llm(prompt)
-        yaml_str = response.split("```yaml")[1].split("```")[0].strip()
+        response = call_llm(prompt, use_cache=(use_cache and self.cur_retry == 0), cache_ttl=RESPONSE_CACHE_TTL)
+        yaml_str = extract_yaml(response)
         
-        result = yaml.safe_load(yaml_str)
+        result = yaml.load(yaml_str, Loader=YamlLoader)
         
         if not isinstance(result, dict) or "chapter_order" not in result:
             raise ValueError("Invalid response format - missing chapter_order")
@@ -142,18 +302,10 @@ reasoning: "Brief explanation of the ordering logic"
         if not isinstance(chapter_order, list):
             raise ValueError("chapter_order must be a list")
         
-        # Validate all indices are valid
-        valid_order = []
-        for idx in chapter_order:
-            if isinstance(idx, int) and 0 <= idx < len(abstractions):
-                valid_order.append(idx)
-        
-        if not valid_order:
-            # Fallback to simple sequential order
-            valid_order = list(range(len(abstractions)))
+        order = _complete_order(order, unresolved, chapter_order)
         
-        print(f"Ordered {len(valid_order)} components for documentation")
-        return valid_order
+        print(f"Ordered {len(order)} components for documentation")
+        return order
     
     def post(self, shared, prep_res, exec_res):
         shared["chapter_order"] = exec_res
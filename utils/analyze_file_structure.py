@@ -1,27 +1,149 @@
 import ast
 import re
 import os
-from typing import Dict, List, Set, Any, Tuple
+import sys
+import shelve
+import hashlib
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Set, Any, Tuple, Iterable, Union, MutableMapping
 from collections import defaultdict, Counter
 
-def analyze_file_structure(files: Dict[str, str], language_patterns: Dict[str, Any] = None) -> Dict[str, Any]:
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+# One combined pattern per language, compiled once at import time. Each alternative
+# captures into a named group that _scan routes to the matching file_info field, so a
+# file is traversed once regardless of how many constructs are extracted from it.
+_IDENT = r'[a-zA-Z_][a-zA-Z0-9_]*'
+_DOTTED = rf'{_IDENT}(?:\.{_IDENT})*'
+_PY_SCAN_RE = re.compile(
+    # "import a, b.c as d" captures the whole list; "from .a.b import c" captures "a.b" like ast does
+    rf'^\s*(?:import\s+(?P<import_list>{_DOTTED}(?:\s+as\s+{_IDENT})?(?:\s*,\s*{_DOTTED}(?:\s+as\s+{_IDENT})?)*)'
+    rf'|from\s+\.*(?P<import>{_DOTTED})\s+import'
+    rf'|def\s+(?P<function>{_IDENT})'
+    rf'|class\s+(?P<class>{_IDENT}))',
+    re.MULTILINE,
+)
+_JS_SCAN_RE = re.compile(
+    r'import\s+[\'"`](?P<import>[^\'"`]+)[\'"`]'             # import "module"
+    r'|import\s+.*?\s+from\s+[\'"`](?P<import_from>[^\'"`]+)[\'"`]'  # import ... from "module"
+    r'|require\([\'"`](?P<require>[^\'"`]+)[\'"`]\)'          # require("module")
+    r'|(?P<export>export\s+)'
+)
+_GO_SCAN_RE = re.compile(rf'import\s+["`](?P<import>[^"`]+)["`]|func\s+(?P<function>{_IDENT})')
+_JAVA_SCAN_RE = re.compile(rf'import\s+(?P<import>{_IDENT}[a-zA-Z0-9_.]*);|class\s+(?P<class>{_IDENT})')
+_C_SCAN_RE = re.compile(
+    r'#include\s+[<"](?P<import>[^>"]+)[>"]'
+    rf'|^\s*(?:static\s+)?(?:inline\s+)?[a-zA-Z_][a-zA-Z0-9_*\s]+\s+(?P<function>{_IDENT})\s*\(',
+    re.MULTILINE,
+)
+
+# Substrings marking a configuration file, matched against the lower-cased path
+_CONFIG_INDICATORS = (
+    # File names
+    'config', 'settings', 'setup', 'makefile', 'dockerfile',
+    # File extensions
+    '.json', '.yaml', '.yml', '.toml', '.ini', '.cfg',
+    '.env', '.properties'
+)
+
+def _build_config_automaton():
+    """Aho-Corasick automaton over _CONFIG_INDICATORS, or None without pyahocorasick."""
+    if ahocorasick is None:
+        return None
+    automaton = ahocorasick.Automaton()
+    for indicator in _CONFIG_INDICATORS:
+        automaton.add_word(indicator, indicator)
+    automaton.make_automaton()
+    return automaton
+
+_CONFIG_AUTOMATON = _build_config_automaton()
+
+# File extension -> language
+_LANG_MAP = {
+    '.py': 'python', '.pyi': 'python', '.pyx': 'python',
+    '.js': 'javascript', '.jsx': 'javascript',
+    '.ts': 'typescript', '.tsx': 'typescript',
+    '.go': 'go',
+    '.java': 'java',
+    '.c': 'c', '.h': 'c',
+    '.cpp': 'cpp', '.cc': 'cpp', '.cxx': 'cpp',
+    '.rs': 'rust',
+    '.rb': 'ruby',
+    '.php': 'php',
+    '.swift': 'swift',
+    '.kt': 'kotlin'
+}
+
+# Persistent cache of full analysis results, keyed by a hash of every (path, content) pair.
+# Bump STRUCTURE_CACHE_VERSION whenever the shape or semantics of the analysis change.
+STRUCTURE_CACHE_PATH = os.path.expanduser(os.getenv("STRUCTURE_CACHE_PATH", "~/.pocketflow/structure_cache"))
+STRUCTURE_CACHE_VERSION = 13
+
+# Persistent cache of per-file rows, keyed by path and validated against a content digest,
+# so a changed codebase only re-analyzes the files that actually changed
+FILE_INFO_CACHE_PATH = os.path.expanduser(os.getenv("FILE_INFO_CACHE_PATH", "~/.pocketflow/file_info_cache"))
+
+# Per-file columns of structure["file_info"], in the order analyze_single_file returns them
+FILE_INFO_COLUMNS = ("size", "lines", "imports", "exports", "functions", "classes", "has_main", "is_config", "language")
+
+# Files are analyzed in a process pool once a codebase is large enough to amortize its startup
+ANALYSIS_WORKERS = int(os.getenv("ANALYSIS_WORKERS", str(os.cpu_count() or 1)))
+PARALLEL_MIN_FILES = 32
+
+def structure_cache_key(files: Iterable[Tuple[str, str]]) -> str:
+    """Merkle-style hash over sorted (path, sha1(content)) pairs."""
+    leaves = (
+        f"{path}:{hashlib.sha1(content.encode('utf-8')).hexdigest()}".encode("utf-8")
+        for path, content in sorted(files)
+    )
+    return hashlib.sha256(b"\0".join([f"v{STRUCTURE_CACHE_VERSION}".encode("utf-8"), *leaves])).hexdigest()
+
+def analyze_file_structure_cached(files: List[Tuple[str, str]], use_cache: bool = True) -> Dict[str, Any]:
+    """Return analyze_file_structure(files), reusing a stored result when no file has changed."""
+    if not use_cache:
+        return analyze_file_structure(files)
+
+    key = structure_cache_key(files)
+    os.makedirs(os.path.dirname(STRUCTURE_CACHE_PATH), exist_ok=True)
+    with shelve.open(STRUCTURE_CACHE_PATH) as cache:
+        if key in cache:
+            return cache[key]
+        os.makedirs(os.path.dirname(FILE_INFO_CACHE_PATH), exist_ok=True)
+        with shelve.open(FILE_INFO_CACHE_PATH) as file_cache:
+            structure = analyze_file_structure(files, file_cache=file_cache)
+        cache[key] = structure
+    return structure
+
+def analyze_file_structure(files: Union[Iterable[Tuple[str, str]], Dict[str, str]], language_patterns: Dict[str, Any] = None,
+                           file_cache: MutableMapping = None, want_dir_members: bool = False) -> Dict[str, Any]:
     """
     Analyze codebase structure to extract imports, dependencies, entry points, and patterns
     without requiring full content analysis.
     
     Args:
-        files: Dictionary mapping file paths to file contents
+        files: Iterable of (file path, file content) tuples, consumed once
+               (a dict mapping paths to contents is also accepted)
         language_patterns: Optional language-specific patterns for analysis
+        file_cache: Optional persistent mapping of per-file rows; unchanged files
+                    are read from it instead of being re-analyzed
+        want_dir_members: Also list the file names in each directory under
+                          directory_structure["dir_members"]
         
     Returns:
         Dictionary containing structural analysis results
     """
+    if isinstance(files, dict):
+        files = files.items()
     
     # Initialize analysis results
     structure = {
-        "file_info": {},           # Per-file metadata
-        "imports": defaultdict(set),  # file -> set of imported modules
-        "exports": defaultdict(set),  # file -> set of exported symbols  
+        "file_info": new_file_info_columns(),  # Per-file metadata, one column per field
+        "imports": {},             # file -> frozenset of imported modules
+        "exports": {},             # file -> frozenset of exported symbols
         "dependencies": defaultdict(set),  # file -> set of files it depends on
         "entry_points": [],        # Likely entry point files
         "core_modules": [],        # Files that are imported by many others
@@ -30,50 +152,164 @@ def analyze_file_structure(files: Dict[str, str], language_patterns: Dict[str, A
         "patterns": {}            # Detected architectural patterns
     }
     
-    # Analyze each file
-    for file_path, content in files.items():
-        file_info = analyze_single_file(file_path, content)
-        structure["file_info"][file_path] = file_info
+    # Analyze each file, appending one row to every column
+    columns = structure["file_info"]
+    file_paths = columns["path"]
+    items = [(file_path, content, os.path.splitext(file_path)[1]) for file_path, content in files]
+    results = _analyze_files(items) if file_cache is None else _analyze_files_incremental(items, file_cache)
+    dir_counts = Counter()
+    dir_members = defaultdict(list) if want_dir_members else None
+    max_depth = 0
+    for file_path, ext, row in results:
+        file_paths.append(file_path)
+        for name, value in zip(FILE_INFO_COLUMNS, row):
+            columns[name].append(value)
+        imports, exports = row[2], row[3]
         
         # Count file types
-        ext = os.path.splitext(file_path)[1]
         structure["file_types"][ext] += 1
         
         # Extract imports and dependencies
-        if file_info["imports"]:
-            structure["imports"][file_path] = file_info["imports"]
+        if imports:
+            structure["imports"][file_path] = imports
             
-        if file_info["exports"]:
-            structure["exports"][file_path] = file_info["exports"]
+        if exports:
+            structure["exports"][file_path] = exports
+        
+        # Group files by directory while the path is at hand
+        dir_path, basename = os.path.split(file_path)
+        if dir_path:
+            dir_counts[dir_path] += 1
+            if dir_members is not None:
+                dir_members[dir_path].append(basename)
+        max_depth = max(max_depth, file_path.count('/') + 1)
     
     # Build dependency graph
-    structure["dependencies"] = build_dependency_graph(structure["imports"], files.keys())
+    structure["dependencies"], dependents = build_dependency_graph(structure["imports"], file_paths)
     
     # Identify entry points and core modules
-    structure["entry_points"] = identify_entry_points(structure, files)
-    structure["core_modules"] = identify_core_modules(structure["dependencies"])
+    structure["entry_points"] = identify_entry_points(structure)
+    structure["core_modules"] = identify_core_modules(dependents)
     
     # Analyze directory structure
-    structure["directory_structure"] = analyze_directory_structure(files.keys())
+    structure["directory_structure"] = analyze_directory_structure(dir_counts, max_depth, dir_members)
     
     # Detect architectural patterns
     structure["patterns"] = detect_patterns(structure)
     
     return structure
 
-def analyze_single_file(file_path: str, content: str) -> Dict[str, Any]:
-    """Analyze a single file to extract imports, exports, and basic info."""
+def new_file_info_columns() -> Dict[str, Any]:
+    """
+    Empty struct-of-arrays table for per-file metadata. Row i of every column describes
+    the file at path[i]; numeric and flag columns are packed into C buffers. Entries of
+    the imports, exports, functions and classes columns are None for files without any.
+    """
+    return {
+        "path": [],
+        "size": array("i"),
+        "lines": array("i"),
+        "imports": [],
+        "exports": [],
+        "functions": [],
+        "classes": [],
+        "has_main": bytearray(),
+        "is_config": bytearray(),
+        "language": [],
+    }
+
+def file_info_records(file_info: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """
+    Rebuild one record per path from the struct-of-arrays file_info, leaving out empty
+    collections and unset flags. This is the shape to show an LLM, which can't be expected
+    to line up index i across a dozen parallel arrays.
+    """
+    records = {}
+    for i, path in enumerate(file_info["path"]):
+        record = {}
+        for name in FILE_INFO_COLUMNS:
+            value = file_info[name][i]
+            if value:
+                record[name] = bool(value) if name in ("has_main", "is_config") else value
+        records[path] = record
+    return records
+
+def structure_for_prompt(structure: Dict[str, Any], paths: Iterable[str] = None) -> Dict[str, Any]:
+    """
+    Shallow copy of an analysis result with file_info as per-path records, for LLM prompts.
+    With paths, the copy is trimmed to a summary around those files: per-file records,
+    imports, exports and dependencies are kept only for them, and the full directory
+    listing is dropped in favour of its depth and common directories.
+    """
+    prompt_structure = dict(structure)
+    if "file_info" in structure:
+        prompt_structure["file_info"] = file_info_records(structure["file_info"])
+    if paths is None:
+        return prompt_structure
+
+    paths = set(paths)
+    for key in ("file_info", "imports", "exports", "dependencies"):
+        if key in prompt_structure:
+            prompt_structure[key] = {p: v for p, v in prompt_structure[key].items() if p in paths}
+    if "directory_structure" in structure:
+        prompt_structure["directory_structure"] = {
+            k: v for k, v in structure["directory_structure"].items() if k in ("depth", "common_dirs")
+        }
+    return prompt_structure
+
+def _analyze_files(files: List[Tuple[str, str, str]]) -> Iterable[Tuple[str, str, Tuple]]:
+    """Yield (path, ext, row) for each file, in input order, fanning out to worker processes."""
+    workers = min(ANALYSIS_WORKERS, len(files) // PARALLEL_MIN_FILES)
+    if workers <= 1:
+        return map(_analyze_item, files)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # A few chunks per worker keeps IPC low while still balancing uneven file sizes
+        return list(executor.map(_analyze_item, files, chunksize=max(1, len(files) // (workers * 4))))
+
+def _analyze_files_incremental(files: List[Tuple[str, str, str]], file_cache: MutableMapping) -> List[Tuple[str, str, Tuple]]:
+    """Like _analyze_files, but reuses cached rows for files whose content digest is unchanged."""
+    results = [None] * len(files)
+    misses = []
+    for i, (file_path, content, ext) in enumerate(files):
+        digest = hashlib.blake2b(content.encode("utf-8"), digest_size=16).hexdigest()
+        cached = file_cache.get(f"v{STRUCTURE_CACHE_VERSION}:{file_path}")
+        if cached is not None and cached[0] == digest:
+            results[i] = (file_path, ext, cached[1])
+        else:
+            misses.append((i, digest))
+    
+    analyzed = _analyze_files([files[i] for i, _ in misses])
+    for (i, digest), (file_path, ext, row) in zip(misses, analyzed):
+        results[i] = (file_path, ext, row)
+        file_cache[f"v{STRUCTURE_CACHE_VERSION}:{file_path}"] = (digest, row)
+    return results
+
+def _analyze_item(item: Tuple[str, str, str]) -> Tuple[str, str, Tuple]:
+    """Picklable (path, content, ext) -> (path, ext, row) adapter for the process pool."""
+    file_path, content, ext = item
+    return file_path, ext, analyze_single_file(file_path, content, ext.lower())
+
+def analyze_single_file(file_path: str, content: str, ext: str = None) -> Tuple:
+    """
+    Analyze a single file to extract imports, exports, and basic info.
+    ext is the lower-cased extension, derived from file_path when omitted.
+    Returns a row of values ordered like FILE_INFO_COLUMNS.
+    """
+    if ext is None:
+        ext = os.path.splitext(file_path)[1].lower()
     
     file_info = {
         "size": len(content),
         "lines": len(content.splitlines()),
-        "imports": set(),
-        "exports": set(),
-        "functions": [],
-        "classes": [],
+        # Collections stay None until their first element (see _add); imports and
+        # exports are collected as lists and deduplicated once into frozensets at the end
+        "imports": None,
+        "exports": None,
+        "functions": None,
+        "classes": None,
         "has_main": False,
         "is_config": False,
-        "language": detect_language(file_path)
+        "language": detect_language(ext)
     }
     
     # Language-specific analysis
@@ -91,157 +327,148 @@ def analyze_single_file(file_path: str, content: str) -> Dict[str, Any]:
     # Detect configuration files
     file_info["is_config"] = is_config_file(file_path, content)
     
-    return file_info
+    for key in ("imports", "exports"):
+        if file_info[key] is not None:
+            file_info[key] = frozenset(file_info[key])
+    return tuple(file_info[name] for name in FILE_INFO_COLUMNS)
 
-def detect_language(file_path: str) -> str:
-    """Detect programming language from file extension."""
-    ext = os.path.splitext(file_path)[1].lower()
-    
-    lang_map = {
-        '.py': 'python', '.pyi': 'python', '.pyx': 'python',
-        '.js': 'javascript', '.jsx': 'javascript',
-        '.ts': 'typescript', '.tsx': 'typescript',
-        '.go': 'go',
-        '.java': 'java',
-        '.c': 'c', '.h': 'c',
-        '.cpp': 'cpp', '.cc': 'cpp', '.cxx': 'cpp',
-        '.rs': 'rust',
-        '.rb': 'ruby',
-        '.php': 'php',
-        '.swift': 'swift',
-        '.kt': 'kotlin'
-    }
-    
-    return lang_map.get(ext, 'unknown')
+def detect_language(ext: str) -> str:
+    """Detect programming language from a lower-cased file extension."""
+    return _LANG_MAP.get(ext, 'unknown')
+
+def _add(file_info: Dict, key: str, value: str) -> None:
+    """Append value to a file_info collection, creating it on first use."""
+    if file_info[key] is None:
+        file_info[key] = [value]
+    else:
+        file_info[key].append(value)
+
+# Statements whose nested blocks can hold conditional imports or definitions
+_TRY_NODES = (ast.Try, ast.TryStar) if hasattr(ast, "TryStar") else (ast.Try,)
+
+def _collect_python_structure(body: List[ast.stmt], file_info: Dict) -> None:
+    """
+    Collect imports, functions and classes from a block of statements. Only class bodies
+    and if/try blocks are descended into; function bodies, which dominate node counts,
+    are skipped along with any nested defs and local imports they contain.
+    """
+    for node in body:
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                _add(file_info, "imports", sys.intern(alias.name))
+        elif isinstance(node, ast.ImportFrom):
+            if node.module:
+                _add(file_info, "imports", sys.intern(node.module))
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            _add(file_info, "functions", node.name)
+            if node.name == "main":
+                file_info["has_main"] = True
+        elif isinstance(node, ast.ClassDef):
+            _add(file_info, "classes", node.name)
+            # Methods and nested classes
+            _collect_python_structure(node.body, file_info)
+        elif isinstance(node, ast.If):
+            _collect_python_structure(node.body, file_info)
+            _collect_python_structure(node.orelse, file_info)
+        elif isinstance(node, _TRY_NODES):
+            _collect_python_structure(node.body, file_info)
+            for handler in node.handlers:
+                _collect_python_structure(handler.body, file_info)
+            _collect_python_structure(node.orelse, file_info)
+            _collect_python_structure(node.finalbody, file_info)
 
 def analyze_python_file(content: str, file_info: Dict) -> None:
     """Analyze Python file for imports, exports, and structure."""
+    # Without definitions only imports are recorded, so skip files that have none. Files
+    # that do mention imports still go through ast, which ignores ones inside strings.
+    if "def " not in content and "class " not in content and "import" not in content:
+        return
+    
     try:
         tree = ast.parse(content)
-        
-        for node in ast.walk(tree):
-            if isinstance(node, ast.Import):
-                for alias in node.names:
-                    file_info["imports"].add(alias.name)
-                    
-            elif isinstance(node, ast.ImportFrom):
-                if node.module:
-                    file_info["imports"].add(node.module)
-                    
-            elif isinstance(node, ast.FunctionDef):
-                file_info["functions"].append(node.name)
-                if node.name == "main":
-                    file_info["has_main"] = True
-                    
-            elif isinstance(node, ast.ClassDef):
-                file_info["classes"].append(node.name)
-                
+        _collect_python_structure(tree.body, file_info)
     except SyntaxError:
         # Fallback to regex if AST parsing fails
         analyze_python_regex(content, file_info)
 
 def analyze_python_regex(content: str, file_info: Dict) -> None:
     """Fallback regex analysis for Python files."""
-    # Import patterns
-    import_patterns = [
-        r'^\s*import\s+([a-zA-Z_][a-zA-Z0-9_]*(?:\.[a-zA-Z_][a-zA-Z0-9_]*)*)',
-        r'^\s*from\s+([a-zA-Z_][a-zA-Z0-9_]*(?:\.[a-zA-Z_][a-zA-Z0-9_]*)*)\s+import'
-    ]
-    
-    for pattern in import_patterns:
-        matches = re.findall(pattern, content, re.MULTILINE)
-        file_info["imports"].update(matches)
-    
-    # Function and class patterns
-    func_matches = re.findall(r'^\s*def\s+([a-zA-Z_][a-zA-Z0-9_]*)', content, re.MULTILINE)
-    class_matches = re.findall(r'^\s*class\s+([a-zA-Z_][a-zA-Z0-9_]*)', content, re.MULTILINE)
-    
-    file_info["functions"].extend(func_matches)
-    file_info["classes"].extend(class_matches)
+    _scan(_PY_SCAN_RE, content, file_info)
     
     if "def main(" in content or 'if __name__ == "__main__"' in content:
         file_info["has_main"] = True
 
+def _scan(pattern: "re.Pattern", content: str, file_info: Dict) -> None:
+    """Run a combined language pattern once, routing each match by its named group."""
+    export_kind = None  # Every export in a file is labelled by one whole-file check
+    for match in pattern.finditer(content):
+        kind = match.lastgroup
+        if kind in ("import", "import_from", "require"):
+            _add(file_info, "imports", sys.intern(match.group(kind)))
+        elif kind == "import_list":
+            for name in match.group(kind).split(","):
+                _add(file_info, "imports", sys.intern(name.split()[0]))
+        elif kind == "function":
+            _add(file_info, "functions", match.group(kind))
+        elif kind == "class":
+            _add(file_info, "classes", match.group(kind))
+        elif kind == "export":
+            if export_kind is None:
+                export_kind = "default" if "export default" in content else "named"
+            _add(file_info, "exports", export_kind)
+
 def analyze_js_ts_file(content: str, file_info: Dict) -> None:
     """Analyze JavaScript/TypeScript file for imports and exports."""
-    # Import patterns
-    import_patterns = [
-        r'import\s+.*?\s+from\s+[\'"`]([^\'"`]+)[\'"`]',  # import ... from "module"
-        r'import\s+[\'"`]([^\'"`]+)[\'"`]',                # import "module"
-        r'require\([\'"`]([^\'"`]+)[\'"`]\)',              # require("module")
-    ]
-    
-    for pattern in import_patterns:
-        matches = re.findall(pattern, content)
-        file_info["imports"].update(matches)
-    
-    # Export patterns
-    if re.search(r'export\s+(default\s+)?', content):
-        file_info["exports"].add("default" if "export default" in content else "named")
+    # Imports, requires and exports
+    _scan(_JS_SCAN_RE, content, file_info)
 
 def analyze_go_file(content: str, file_info: Dict) -> None:
     """Analyze Go file for imports and structure."""
-    # Import patterns
-    import_matches = re.findall(r'import\s+["`]([^"`]+)["`]', content)
-    file_info["imports"].update(import_matches)
-    
-    # Function patterns
-    func_matches = re.findall(r'func\s+([a-zA-Z_][a-zA-Z0-9_]*)', content)
-    file_info["functions"].extend(func_matches)
+    _scan(_GO_SCAN_RE, content, file_info)
     
     if "func main(" in content:
         file_info["has_main"] = True
 
 def analyze_java_file(content: str, file_info: Dict) -> None:
     """Analyze Java file for imports and structure."""
-    # Import patterns
-    import_matches = re.findall(r'import\s+([a-zA-Z_][a-zA-Z0-9_.]*);', content)
-    file_info["imports"].update(import_matches)
-    
-    # Class patterns
-    class_matches = re.findall(r'class\s+([a-zA-Z_][a-zA-Z0-9_]*)', content)
-    file_info["classes"].extend(class_matches)
+    _scan(_JAVA_SCAN_RE, content, file_info)
 
 def analyze_c_cpp_file(content: str, file_info: Dict) -> None:
     """Analyze C/C++ file for includes and structure."""
-    # Include patterns
-    include_matches = re.findall(r'#include\s+[<"]([^>"]+)[>"]', content)
-    file_info["imports"].update(include_matches)
-    
-    # Function patterns (basic)
-    func_matches = re.findall(r'^\s*(?:static\s+)?(?:inline\s+)?[a-zA-Z_][a-zA-Z0-9_*\s]+\s+([a-zA-Z_][a-zA-Z0-9_]*)\s*\(', content, re.MULTILINE)
-    file_info["functions"].extend(func_matches)
+    # Includes and (basic) function definitions
+    _scan(_C_SCAN_RE, content, file_info)
     
     if "int main(" in content:
         file_info["has_main"] = True
 
 def is_config_file(file_path: str, content: str) -> bool:
     """Determine if a file is a configuration file."""
-    config_indicators = [
-        # File names
-        'config', 'settings', 'setup', 'Makefile', 'Dockerfile',
-        # File extensions
-        '.json', '.yaml', '.yml', '.toml', '.ini', '.cfg',
-        '.env', '.properties'
-    ]
-    
     file_lower = file_path.lower()
-    return any(indicator in file_lower for indicator in config_indicators)
+    if _CONFIG_AUTOMATON is not None:
+        # One linear scan for all indicators, stopping at the first match
+        return next(_CONFIG_AUTOMATON.iter(file_lower), None) is not None
+    return any(indicator in file_lower for indicator in _CONFIG_INDICATORS)
 
-def build_dependency_graph(imports: Dict[str, Set], all_files: List[str]) -> Dict[str, Set]:
-    """Build dependency graph between files."""
+def build_dependency_graph(imports: Dict[str, Set], all_files: List[str]) -> Tuple[Dict[str, Set], Counter]:
+    """
+    Build dependency graph between files.
+    Returns (dependencies, dependents): file -> files it depends on, and file -> number
+    of files that depend on it, both filled in the same pass over the imports.
+    """
     dependencies = defaultdict(set)
+    dependents = Counter()
     
-    # Create mapping from module names to file paths
+    # Create mapping from module names to file paths. Keys and imported names are both
+    # interned, so the lookups below mostly resolve by identity rather than string compares.
     module_to_file = {}
     for file_path in all_files:
         # Simple heuristic: convert file path to module name
         module_name = file_path.replace('/', '.').replace('\\', '.').replace('.py', '')
-        module_to_file[module_name] = file_path
+        module_to_file[sys.intern(module_name)] = file_path
         
         # Also try basename
         basename = os.path.splitext(os.path.basename(file_path))[0]
-        module_to_file[basename] = file_path
+        module_to_file[sys.intern(basename)] = file_path
     
     # Build dependencies
     for file_path, file_imports in imports.items():
@@ -249,18 +476,21 @@ def build_dependency_graph(imports: Dict[str, Set], all_files: List[str]) -> Dic
             # Try to find corresponding file
             if imported_module in module_to_file:
                 target_file = module_to_file[imported_module]
-                if target_file != file_path:  # Don't self-reference
+                # Don't self-reference, and count each dependent file once
+                if target_file != file_path and target_file not in dependencies.get(file_path, ()):
                     dependencies[file_path].add(target_file)
+                    dependents[target_file] += 1
     
-    return dependencies
+    return dependencies, dependents
 
-def identify_entry_points(structure: Dict, files: Dict[str, str]) -> List[str]:
+def identify_entry_points(structure: Dict) -> List[str]:
     """Identify likely entry point files."""
     entry_points = []
     
-    for file_path, file_info in structure["file_info"].items():
+    file_info = structure["file_info"]
+    for file_path, has_main, size in zip(file_info["path"], file_info["has_main"], file_info["size"]):
         # Check for main functions
-        if file_info["has_main"]:
+        if has_main:
             entry_points.append(file_path)
             continue
             
@@ -271,37 +501,33 @@ def identify_entry_points(structure: Dict, files: Dict[str, str]) -> List[str]:
             continue
             
         # Check for setup files
-        if basename in ['setup.py', '__init__.py'] and file_info["size"] > 100:
+        if basename in ['setup.py', '__init__.py'] and size > 100:
             entry_points.append(file_path)
     
     return entry_points
 
-def identify_core_modules(dependencies: Dict[str, Set]) -> List[Tuple[str, int]]:
+def identify_core_modules(dependents: Counter) -> List[Tuple[str, int]]:
     """Identify core modules based on how many files depend on them."""
-    dependents = defaultdict(int)
-    
-    for file_path, deps in dependencies.items():
-        for dep in deps:
-            dependents[dep] += 1
-    
-    # Sort by number of dependents
-    core_modules = sorted(dependents.items(), key=lambda x: x[1], reverse=True)
-    return core_modules[:10]  # Top 10 most depended-upon files
+    # Top 10 most depended-upon files, selected with a heap rather than a full sort
+    return dependents.most_common(10)
 
-def analyze_directory_structure(file_paths: List[str]) -> Dict[str, Any]:
-    """Analyze directory organization patterns."""
-    directories = defaultdict(list)
-    
-    for file_path in file_paths:
-        dir_path = os.path.dirname(file_path)
-        if dir_path:
-            directories[dir_path].append(os.path.basename(file_path))
-    
-    return {
-        "directories": dict(directories),
-        "depth": max(len(path.split('/')) for path in file_paths),
-        "common_dirs": [d for d, files in directories.items() if len(files) > 3]
+def analyze_directory_structure(dir_counts: Counter, depth: int, dir_members: Dict[str, List[str]] = None) -> Dict[str, Any]:
+    """
+    Analyze directory organization patterns from the per-directory file counts (and,
+    optionally, file names) and maximum path depth collected by analyze_file_structure.
+    """
+    directory_structure = {
+        "directories": dict(dir_counts),  # directory -> number of files directly in it
+        "depth": depth,
+        "common_dirs": [d for d, count in dir_counts.items() if count > 3]
     }
+    if dir_members is not None:
+        directory_structure["dir_members"] = dict(dir_members)
+    return directory_structure
+
+# Directory names that signal an architectural pattern
+_MVC_DIRS = frozenset({'models', 'views', 'controllers'})
+_LAYERED_DIRS = frozenset({'service', 'repository', 'controller', 'entity'})
 
 def detect_patterns(structure: Dict) -> Dict[str, Any]:
     """Detect common architectural patterns."""
@@ -309,17 +535,17 @@ def detect_patterns(structure: Dict) -> Dict[str, Any]:
     
     directories = structure["directory_structure"]["directories"]
     
+    # Match whole path segments, so e.g. "viewstate/" doesn't count as "views/"
+    dir_segments = {seg.lower() for path in directories for seg in path.split('/')}
+    
     # MVC pattern
-    has_mvc = any(d in str(directories.keys()).lower() for d in ['models', 'views', 'controllers'])
-    patterns["mvc"] = has_mvc
+    patterns["mvc"] = not _MVC_DIRS.isdisjoint(dir_segments)
     
     # Layered architecture
-    has_layers = any(d in str(directories.keys()).lower() for d in ['service', 'repository', 'controller', 'entity'])
-    patterns["layered"] = has_layers
+    patterns["layered"] = not _LAYERED_DIRS.isdisjoint(dir_segments)
     
     # Test structure
-    has_tests = any('test' in d.lower() for d in directories.keys())
-    patterns["has_tests"] = has_tests
+    patterns["has_tests"] = any(seg.startswith('test') for seg in dir_segments)
     
     # Package structure
     has_packages = len(directories) > 3
@@ -351,7 +577,7 @@ class DataProcessor:
 """
     }
     
-    result = analyze_file_structure(example_files)
+    result = analyze_file_structure(example_files.items())
     print("Structure Analysis Results:")
     for key, value in result.items():
         print(f"{key}: {value}") 
\ No newline at end of file
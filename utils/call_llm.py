@@ -1,8 +1,11 @@
 from google import genai
+from google.genai import types
 import os
 import logging
-import json
+import time
+import threading
 from datetime import datetime
+from utils.llm_cache import llm_cache, make_key, make_scope
 
 # Configure logging
 log_directory = os.getenv("LOG_DIR", "logs")
@@ -21,30 +24,78 @@ file_handler.setFormatter(
 )
 logger.addHandler(file_handler)
 
-# Simple cache configuration
-cache_file = "llm_cache.json"
+class TokenBucket:
+    """Proactive requests-per-minute and tokens-per-minute limiter.
+
+    Each call reserves one request and its estimated tokens, going into debt
+    if the buckets are empty; the caller then sleeps until the debt is repaid.
+    A limit of 0 disables that bucket.
+    """
+
+    def __init__(self, rpm: int, tpm: int):
+        self.rpm = rpm
+        self.tpm = tpm
+        self._requests = float(rpm)
+        self._tokens = float(tpm)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self, tokens: int) -> float:
+        """Reserve capacity and return the number of seconds to wait."""
+        with self._lock:
+            now = time.monotonic()
+            elapsed = now - self._last
+            self._last = now
+
+            wait = 0.0
+            if self.rpm:
+                self._requests = min(self.rpm, self._requests + elapsed * self.rpm / 60) - 1
+                wait = max(wait, -self._requests * 60 / self.rpm)
+            if self.tpm:
+                # A single oversized prompt can never need more than a full bucket
+                self._tokens = min(self.tpm, self._tokens + elapsed * self.tpm / 60) - min(tokens, self.tpm)
+                wait = max(wait, -self._tokens * 60 / self.tpm)
+            return wait
+
+    def acquire(self, tokens: int) -> None:
+        wait = self._reserve(tokens)
+        if wait > 0:
+            logger.info(f"Rate limit: waiting {wait:.1f}s before LLM call")
+            time.sleep(wait)
+
+
+def estimate_tokens(prompt: str) -> int:
+    """Rough token estimate (~4 characters per token)."""
+    return len(prompt) // 4
+
+
+# Shared by every call_llm call, including the worker threads of call_llm_async,
+# so all nodes respect the same provider limits.
+# Both limits default to 0 (unthrottled); set them to match your provider quota.
+rate_limiter = TokenBucket(
+    rpm=int(os.getenv("LLM_RPM", "0")),
+    tpm=int(os.getenv("LLM_TPM", "0")),
+)
 
 
 # By default, we Google Gemini 2.5 pro, as it shows great performance for code understanding
-def call_llm(prompt: str, use_cache: bool = True) -> str:
+def call_llm(prompt: str, use_cache: bool = True, system: str = None, cache_ttl: int = None,
+             semantic_text: str = None) -> str:
     # Log the prompt
     logger.info(f"PROMPT: {prompt}")
 
+    model = os.getenv("GEMINI_MODEL", "gemini-2.5-pro-exp-03-25")
+    # model = os.getenv("GEMINI_MODEL", "gemini-2.5-flash-preview-04-17")
+    cache_key = make_key(prompt, model, system=system)
+    # Only calls that pass semantic_text (the varying part of the prompt) use the semantic tier
+    scope = make_scope(model, system=system) if semantic_text is not None else None
+
     # Check cache if enabled
     if use_cache:
-        # Load cache from disk
-        cache = {}
-        if os.path.exists(cache_file):
-            try:
-                with open(cache_file, "r", encoding="utf-8") as f:
-                    cache = json.load(f)
-            except:
-                logger.warning(f"Failed to load cache, starting with empty cache")
-
-        # Return from cache if exists
-        if prompt in cache:
-            logger.info(f"RESPONSE: {cache[prompt]}")
-            return cache[prompt]
+        cached = llm_cache.get(cache_key, semantic_text=semantic_text, scope=scope)
+        if cached is not None:
+            logger.info(f"RESPONSE (cached): {cached}")
+            return cached
 
     # # Call the LLM if not in cache or cache disabled
     # client = genai.Client(
@@ -58,10 +109,13 @@ def call_llm(prompt: str, use_cache: bool = True) -> str:
     client = genai.Client(
         api_key=os.getenv("GEMINI_API_KEY", ""),
     )
-    model = os.getenv("GEMINI_MODEL", "gemini-2.5-pro-exp-03-25")
-    # model = os.getenv("GEMINI_MODEL", "gemini-2.5-flash-preview-04-17")
-    
-    response = client.models.generate_content(model=model, contents=[prompt])
+
+    rate_limiter.acquire(estimate_tokens((system or "") + prompt))
+    response = client.models.generate_content(
+        model=model,
+        contents=[prompt],
+        config=types.GenerateContentConfig(system_instruction=system) if system else None,
+    )
     response_text = response.text
 
     # Log the response
@@ -69,28 +123,16 @@ def call_llm(prompt: str, use_cache: bool = True) -> str:
 
     # Update cache if enabled
     if use_cache:
-        # Load cache again to avoid overwrites
-        cache = {}
-        if os.path.exists(cache_file):
-            try:
-                with open(cache_file, "r", encoding="utf-8") as f:
-                    cache = json.load(f)
-            except:
-                pass
-
-        # Add to cache and save
-        cache[prompt] = response_text
-        try:
-            with open(cache_file, "w", encoding="utf-8") as f:
-                json.dump(cache, f)
-        except Exception as e:
-            logger.error(f"Failed to save cache: {e}")
+        llm_cache.set(cache_key, response_text, expire=cache_ttl, semantic_text=semantic_text, scope=scope)
 
     return response_text
 
 
+# The alternatives below keep call_llm's signature and share its cache and rate limiter.
+
 # # Use Azure OpenAI
-# def call_llm(prompt, use_cache: bool = True):
+# def call_llm(prompt: str, use_cache: bool = True, system: str = None, cache_ttl: int = None,
+#              semantic_text: str = None) -> str:
 #     from openai import AzureOpenAI
 
 #     endpoint = "https://<azure openai name>.openai.azure.com/"
@@ -99,15 +141,27 @@ def call_llm(prompt: str, use_cache: bool = True) -> str:
 #     subscription_key = "<azure openai key>"
 #     api_version = "<api version>"
 
+#     logger.info(f"PROMPT: {prompt}")
+#     cache_key = make_key(prompt, deployment, system=system)
+#     scope = make_scope(deployment, system=system) if semantic_text is not None else None
+#     if use_cache:
+#         cached = llm_cache.get(cache_key, semantic_text=semantic_text, scope=scope)
+#         if cached is not None:
+#             logger.info(f"RESPONSE (cached): {cached}")
+#             return cached
+
 #     client = AzureOpenAI(
 #         api_version=api_version,
 #         azure_endpoint=endpoint,
 #         api_key=subscription_key,
 #     )
 
+#     messages = [{"role": "system", "content": system}] if system else []
+#     messages.append({"role": "user", "content": prompt})
+#     rate_limiter.acquire(estimate_tokens((system or "") + prompt))
 #     r = client.chat.completions.create(
 #         model=deployment,
-#         messages=[{"role": "user", "content": prompt}],
+#         messages=messages,
 #         response_format={
 #             "type": "text"
 #         },
@@ -115,75 +169,113 @@ def call_llm(prompt: str, use_cache: bool = True) -> str:
 #         reasoning_effort="medium",
 #         store=False
 #     )
-#     return r.choices[0].message.content
+#     response_text = r.choices[0].message.content
+#     logger.info(f"RESPONSE: {response_text}")
+#     if use_cache:
+#         llm_cache.set(cache_key, response_text, expire=cache_ttl, semantic_text=semantic_text, scope=scope)
+#     return response_text
 
 # # Use Anthropic Claude 3.7 Sonnet Extended Thinking
-# def call_llm(prompt, use_cache: bool = True):
+# def call_llm(prompt: str, use_cache: bool = True, system: str = None, cache_ttl: int = None,
+#              semantic_text: str = None) -> str:
 #     from anthropic import Anthropic
+#     model = "claude-3-7-sonnet-20250219"
+
+#     logger.info(f"PROMPT: {prompt}")
+#     cache_key = make_key(prompt, model, system=system)
+#     scope = make_scope(model, system=system) if semantic_text is not None else None
+#     if use_cache:
+#         cached = llm_cache.get(cache_key, semantic_text=semantic_text, scope=scope)
+#         if cached is not None:
+#             logger.info(f"RESPONSE (cached): {cached}")
+#             return cached
+
 #     client = Anthropic(api_key=os.environ.get("ANTHROPIC_API_KEY", "your-api-key"))
+#     rate_limiter.acquire(estimate_tokens((system or "") + prompt))
 #     response = client.messages.create(
-#         model="claude-3-7-sonnet-20250219",
+#         model=model,
 #         max_tokens=21000,
 #         thinking={
 #             "type": "enabled",
 #             "budget_tokens": 20000
 #         },
+#         **({"system": system} if system else {}),
 #         messages=[
 #             {"role": "user", "content": prompt}
 #         ]
 #     )
-#     return response.content[1].text
+#     response_text = response.content[1].text
+#     logger.info(f"RESPONSE: {response_text}")
+#     if use_cache:
+#         llm_cache.set(cache_key, response_text, expire=cache_ttl, semantic_text=semantic_text, scope=scope)
+#     return response_text
 
 # # Use OpenAI o1
-# def call_llm(prompt, use_cache: bool = True):
+# def call_llm(prompt: str, use_cache: bool = True, system: str = None, cache_ttl: int = None,
+#              semantic_text: str = None) -> str:
 #     from openai import OpenAI
+#     model = "o1"
+
+#     logger.info(f"PROMPT: {prompt}")
+#     cache_key = make_key(prompt, model, system=system)
+#     scope = make_scope(model, system=system) if semantic_text is not None else None
+#     if use_cache:
+#         cached = llm_cache.get(cache_key, semantic_text=semantic_text, scope=scope)
+#         if cached is not None:
+#             logger.info(f"RESPONSE (cached): {cached}")
+#             return cached
+
 #     client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY", "your-api-key"))
+#     messages = [{"role": "system", "content": system}] if system else []
+#     messages.append({"role": "user", "content": prompt})
+#     rate_limiter.acquire(estimate_tokens((system or "") + prompt))
 #     r = client.chat.completions.create(
-#         model="o1",
-#         messages=[{"role": "user", "content": prompt}],
+#         model=model,
+#         messages=messages,
 #         response_format={
 #             "type": "text"
 #         },
 #         reasoning_effort="medium",
 #         store=False
 #     )
-#     return r.choices[0].message.content
+#     response_text = r.choices[0].message.content
+#     logger.info(f"RESPONSE: {response_text}")
+#     if use_cache:
+#         llm_cache.set(cache_key, response_text, expire=cache_ttl, semantic_text=semantic_text, scope=scope)
+#     return response_text
 
 # Use OpenRouter API
-# def call_llm(prompt: str, use_cache: bool = True) -> str:
+# def call_llm(prompt: str, use_cache: bool = True, system: str = None, cache_ttl: int = None,
+#              semantic_text: str = None) -> str:
 #     import requests
 #     # Log the prompt
 #     logger.info(f"PROMPT: {prompt}")
 
-#     # Check cache if enabled
-#     if use_cache:
-#         # Load cache from disk
-#         cache = {}
-#         if os.path.exists(cache_file):
-#             try:
-#                 with open(cache_file, "r", encoding="utf-8") as f:
-#                     cache = json.load(f)
-#             except:
-#                 logger.warning(f"Failed to load cache, starting with empty cache")
-
-#         # Return from cache if exists
-#         if prompt in cache:
-#             logger.info(f"RESPONSE: {cache[prompt]}")
-#             return cache[prompt]
-
 #     # OpenRouter API configuration
 #     api_key = os.getenv("OPENROUTER_API_KEY", "")
 #     model = os.getenv("OPENROUTER_MODEL", "google/gemini-2.0-flash-exp:free")
+#     cache_key = make_key(prompt, model, system=system)
+#     scope = make_scope(model, system=system) if semantic_text is not None else None
+
+#     # Check cache if enabled
+#     if use_cache:
+#         cached = llm_cache.get(cache_key, semantic_text=semantic_text, scope=scope)
+#         if cached is not None:
+#             logger.info(f"RESPONSE (cached): {cached}")
+#             return cached
     
 #     headers = {
 #         "Authorization": f"Bearer {api_key}",
 #     }
 
+#     messages = [{"role": "system", "content": system}] if system else []
+#     messages.append({"role": "user", "content": prompt})
 #     data = {
 #         "model": model,
-#         "messages": [{"role": "user", "content": prompt}]
+#         "messages": messages
 #     }
 
+#     rate_limiter.acquire(estimate_tokens((system or "") + prompt))
 #     response = requests.post(
 #         "https://openrouter.ai/api/v1/chat/completions",
 #         headers=headers,
@@ -207,22 +299,7 @@ def call_llm(prompt: str, use_cache: bool = True) -> str:
 
 #     # Update cache if enabled
 #     if use_cache:
-#         # Load cache again to avoid overwrites
-#         cache = {}
-#         if os.path.exists(cache_file):
-#             try:
-#                 with open(cache_file, "r", encoding="utf-8") as f:
-#                     cache = json.load(f)
-#             except:
-#                 pass
-
-#         # Add to cache and save
-#         cache[prompt] = response_text
-#         try:
-#             with open(cache_file, "w", encoding="utf-8") as f:
-#                 json.dump(cache, f)
-#         except Exception as e:
-#             logger.error(f"Failed to save cache: {e}")
+#         llm_cache.set(cache_key, response_text, expire=cache_ttl, semantic_text=semantic_text, scope=scope)
 
 #     return response_text
 
@@ -0,0 +1,35 @@
+import os
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from utils.call_llm import call_llm
+
+# Maximum number of LLM requests allowed in flight at once
+concurrency = int(os.getenv("LLM_CONCURRENCY", "8"))
+semaphore = asyncio.Semaphore(concurrency)
+# Sized to match, so the default executor's smaller pool never caps concurrency
+executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="call_llm")
+
+
+# Async wrapper around call_llm: the provider, cache, logging and rate limiting are all
+# configured there, and each call runs in a worker thread so async nodes can overlap them
+async def call_llm_async(prompt: str, use_cache: bool = True, system: str = None, cache_ttl: int = None,
+                         semantic_text: str = None) -> str:
+    # Bound the number of concurrent requests to the provider
+    async with semaphore:
+        return await asyncio.get_running_loop().run_in_executor(executor, functools.partial(
+            call_llm, prompt, use_cache=use_cache, system=system, cache_ttl=cache_ttl,
+            semantic_text=semantic_text,
+        ))
+
+
+if __name__ == "__main__":
+    test_prompts = ["Hello, how are you?", "What is 2 + 2?"]
+
+    async def main():
+        responses = await asyncio.gather(*(call_llm_async(p, use_cache=False) for p in test_prompts))
+        for prompt, response in zip(test_prompts, responses):
+            print(f"{prompt} -> {response}")
+
+    print("Making concurrent calls...")
+    asyncio.run(main())
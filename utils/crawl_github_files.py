@@ -5,6 +5,7 @@ import tempfile
 import git
 import time
 import fnmatch
+from concurrent.futures import ThreadPoolExecutor
 from typing import Union, Set, List, Dict, Tuple, Any
 from urllib.parse import urlparse
 
@@ -140,11 +141,41 @@ def crawl_github_files(
     if token:
         headers["Authorization"] = f"token {token}"
 
+    # Attempts per request while GitHub reports a primary or secondary rate limit
+    rate_limit_retries = 5
+
+    def github_get(url: str, params=None):
+        """GET url, waiting out rate limits (403/429) as GitHub asks before giving up"""
+        for attempt in range(rate_limit_retries):
+            response = requests.get(url, headers=headers, params=params)
+            if response.status_code not in (403, 429):
+                return response
+
+            retry_after = response.headers.get('Retry-After')
+            reset_time = response.headers.get('X-RateLimit-Reset')
+            if retry_after is not None:
+                # Secondary rate limits say how long to back off
+                wait_time = int(retry_after)
+            elif response.headers.get('X-RateLimit-Remaining') == '0' and reset_time is not None:
+                wait_time = max(int(reset_time) - time.time(), 0) + 1
+            elif 'rate limit' in response.text.lower():
+                # Secondary limit without a hint: back off exponentially from a minute
+                wait_time = 60 * 2 ** attempt
+            else:
+                # A plain permission error
+                return response
+
+            if attempt == rate_limit_retries - 1:
+                return response
+            print(f"Rate limit exceeded. Waiting for {wait_time:.0f} seconds...")
+            time.sleep(wait_time)
+        return response
+
     def fetch_branches(owner: str, repo: str):
         """Get brancshes of the repository"""
 
         url = f"https://api.github.com/repos/{owner}/{repo}/branches"
-        response = requests.get(url, headers=headers)
+        response = github_get(url)
 
         if response.status_code == 404:
             if not token:
@@ -165,7 +196,7 @@ def crawl_github_files(
         """Check the repository has the given tree"""
 
         url = f"https://api.github.com/repos/{owner}/{repo}/git/trees/{tree}"
-        response = requests.get(url, headers=headers)
+        response = github_get(url)
 
         return True if response.status_code == 200 else False 
 
@@ -210,20 +241,57 @@ def crawl_github_files(
     # Dictionary to store path -> content mapping
     files = {}
     skipped_files = []
+
+    # Directory listings and file downloads are I/O-bound, so they run on a bounded
+    # thread pool. Workers queue follow-up work in `pending` instead of waiting on it.
+    max_workers = int(os.getenv("GITHUB_CRAWL_CONCURRENCY", "20"))
+    pending = []
     
+    def download_file(item, item_path, rel_path, file_size):
+        """Download a single file's content"""
+        if "download_url" in item and item["download_url"]:
+            file_url = item["download_url"]
+            file_response = github_get(file_url)
+            
+            # Final size check in case content-length header is available but differs from metadata
+            content_length = int(file_response.headers.get('content-length', 0))
+            if content_length > max_file_size:
+                skipped_files.append((item_path, content_length))
+                print(f"Skipping {rel_path}: Content length ({content_length} bytes) exceeds limit ({max_file_size} bytes)")
+                return
+                
+            if file_response.status_code == 200:
+                files[rel_path] = file_response.text
+                print(f"Downloaded: {rel_path} ({file_size} bytes) ")
+            else:
+                print(f"Failed to download {rel_path}: {file_response.status_code}")
+        else:
+            # Alternative method if download_url is not available
+            content_response = github_get(item["url"])
+            if content_response.status_code == 200:
+                content_data = content_response.json()
+                if content_data.get("encoding") == "base64" and "content" in content_data:
+                    # Check size of base64 content before decoding
+                    if len(content_data["content"]) * 0.75 > max_file_size:  # Approximate size calculation
+                        estimated_size = int(len(content_data["content"]) * 0.75)
+                        skipped_files.append((item_path, estimated_size))
+                        print(f"Skipping {rel_path}: Encoded content exceeds size limit")
+                        return
+                        
+                    file_content = base64.b64decode(content_data["content"]).decode('utf-8')
+                    files[rel_path] = file_content
+                    print(f"Downloaded: {rel_path} ({file_size} bytes)")
+                else:
+                    print(f"Unexpected content format for {rel_path}")
+            else:
+                print(f"Failed to get content for {rel_path}: {content_response.status_code}")
+
     def fetch_contents(path):
         """Fetch contents of the repository at a specific path and commit"""
         url = f"https://api.github.com/repos/{owner}/{repo}/contents/{path}"
         params = {"ref": ref} if ref != None else {}
         
-        response = requests.get(url, headers=headers, params=params)
-        
-        if response.status_code == 403 and 'rate limit exceeded' in response.text.lower():
-            reset_time = int(response.headers.get('X-RateLimit-Reset', 0))
-            wait_time = max(reset_time - time.time(), 0) + 1
-            print(f"Rate limit exceeded. Waiting for {wait_time:.0f} seconds...")
-            time.sleep(wait_time)
-            return fetch_contents(path)
+        response = github_get(url, params=params)
             
         if response.status_code == 404:
             if not token:
@@ -273,50 +341,21 @@ def crawl_github_files(
                     print(f"Skipping {rel_path}: File size ({file_size} bytes) exceeds limit ({max_file_size} bytes)")
                     continue
                 
-                # For files, get raw content
-                if "download_url" in item and item["download_url"]:
-                    file_url = item["download_url"]
-                    file_response = requests.get(file_url, headers=headers)
-                    
-                    # Final size check in case content-length header is available but differs from metadata
-                    content_length = int(file_response.headers.get('content-length', 0))
-                    if content_length > max_file_size:
-                        skipped_files.append((item_path, content_length))
-                        print(f"Skipping {rel_path}: Content length ({content_length} bytes) exceeds limit ({max_file_size} bytes)")
-                        continue
-                        
-                    if file_response.status_code == 200:
-                        files[rel_path] = file_response.text
-                        print(f"Downloaded: {rel_path} ({file_size} bytes) ")
-                    else:
-                        print(f"Failed to download {rel_path}: {file_response.status_code}")
-                else:
-                    # Alternative method if download_url is not available
-                    content_response = requests.get(item["url"], headers=headers)
-                    if content_response.status_code == 200:
-                        content_data = content_response.json()
-                        if content_data.get("encoding") == "base64" and "content" in content_data:
-                            # Check size of base64 content before decoding
-                            if len(content_data["content"]) * 0.75 > max_file_size:  # Approximate size calculation
-                                estimated_size = int(len(content_data["content"]) * 0.75)
-                                skipped_files.append((item_path, estimated_size))
-                                print(f"Skipping {rel_path}: Encoded content exceeds size limit")
-                                continue
-                                
-                            file_content = base64.b64decode(content_data["content"]).decode('utf-8')
-                            files[rel_path] = file_content
-                            print(f"Downloaded: {rel_path} ({file_size} bytes)")
-                        else:
-                            print(f"Unexpected content format for {rel_path}")
-                    else:
-                        print(f"Failed to get content for {rel_path}: {content_response.status_code}")
+                pending.append(executor.submit(download_file, item, item_path, rel_path, file_size))
             
             elif item["type"] == "dir":
                 # Recursively process subdirectories
-                fetch_contents(item_path)
+                pending.append(executor.submit(fetch_contents, item_path))
     
-    # Start crawling from the specified path
-    fetch_contents(specific_path)
+    # Start crawling from the specified path and drain queued work. A task only
+    # finishes after queueing its children, so an empty queue means the crawl is done.
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending.append(executor.submit(fetch_contents, specific_path))
+        while pending:
+            pending.pop().result()
+
+    # Restore a deterministic, directory-walk order regardless of download completion order
+    files = {path: files[path] for path in sorted(files, key=lambda p: p.split('/'))}
     
     return {
         "files": files,
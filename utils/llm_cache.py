@@ -0,0 +1,186 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from typing import Optional
+
+# Cache configuration
+cache_path = os.path.expanduser(os.getenv("LLM_CACHE_PATH", "~/.pocketflow/llm_cache.sqlite"))
+cache_ttl = int(os.getenv("LLM_CACHE_TTL", "0"))  # Seconds; 0 means entries never expire
+
+# Optional semantic tier: serve a cached response when the embedding of a call's
+# semantic text (the part of its prompt that varies, supplied by the caller) has cosine
+# similarity >= threshold with a cached one made with the same model, system prompt and
+# PROMPT_VERSION. Only call sites that pass semantic_text use it. 0 disables it.
+# Requires sentence-transformers and faiss-cpu.
+semantic_threshold = float(os.getenv("LLM_SEMANTIC_CACHE_THRESHOLD", "0"))
+embedding_model = os.getenv("LLM_EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+
+# Mixed into every key; bump to invalidate all cached responses after prompt changes
+PROMPT_VERSION = "v1"
+
+
+def make_key(prompt: str, model: str, temperature: Optional[float] = None, system: Optional[str] = None) -> str:
+    """Hash everything that determines a completion into a fixed-size cache key."""
+    payload = json.dumps(
+        {"version": PROMPT_VERSION, "model": model, "system": system, "prompt": prompt, "temp": temperature},
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def make_scope(model: str, temperature: Optional[float] = None, system: Optional[str] = None) -> str:
+    """Hash everything except the prompt; semantic matches must share this scope."""
+    payload = json.dumps(
+        {"version": PROMPT_VERSION, "model": model, "system": system, "temp": temperature},
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class SemanticIndex:
+    """In-memory inner-product indexes over normalized text embeddings, one per scope."""
+
+    def __init__(self, model_name: str):
+        from sentence_transformers import SentenceTransformer
+        import faiss
+
+        self._faiss = faiss
+        self.model = SentenceTransformer(model_name)
+        self.dimension = self.model.get_sentence_embedding_dimension()
+        self.indexes = {}  # scope -> (faiss index, keys)
+
+    def embed(self, text: str) -> bytes:
+        return self.model.encode([text], normalize_embeddings=True).astype("float32").tobytes()
+
+    def add(self, scope: str, key: str, vector: bytes) -> None:
+        import numpy as np
+
+        if scope not in self.indexes:
+            self.indexes[scope] = (self._faiss.IndexFlatIP(self.dimension), [])
+        index, keys = self.indexes[scope]
+        index.add(np.frombuffer(vector, dtype="float32").reshape(1, -1))
+        keys.append(key)
+
+    def search(self, scope: str, vector: bytes):
+        """Return (key, score) of the nearest cached entry in scope, or (None, 0.0)."""
+        import numpy as np
+
+        if scope not in self.indexes:
+            return None, 0.0
+        index, keys = self.indexes[scope]
+        scores, ids = index.search(np.frombuffer(vector, dtype="float32").reshape(1, -1), 1)
+        return keys[ids[0][0]], float(scores[0][0])
+
+
+class LLMCache:
+    """Persistent SQLite-backed store of LLM responses keyed by prompt hash."""
+
+    def __init__(self, path: str, ttl: int = 0, semantic_threshold: float = 0.0):
+        self.path = path
+        self.ttl = ttl
+        self.semantic_threshold = semantic_threshold
+        self.metrics = {"hits": 0, "semantic_hits": 0, "misses": 0}
+        self._conn = None
+        self._semantic = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        # Open lazily so importing this module never touches the filesystem
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, response TEXT NOT NULL, expires_at REAL)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS semantic_entries ("
+                "key TEXT PRIMARY KEY, scope TEXT NOT NULL, vector BLOB NOT NULL)"
+            )
+        return self._conn
+
+    def _semantic_index(self) -> Optional[SemanticIndex]:
+        """Load the embedding index on first use, rebuilding it from stored vectors."""
+        if not self.semantic_threshold:
+            return None
+        if self._semantic is None:
+            try:
+                self._semantic = SemanticIndex(embedding_model)
+            except ImportError:
+                print("Warning: semantic LLM cache needs sentence-transformers and faiss-cpu; disabling it.")
+                self.semantic_threshold = 0.0
+                return None
+            for key, scope, vector in self._connect().execute("SELECT key, scope, vector FROM semantic_entries"):
+                self._semantic.add(scope, key, vector)
+        return self._semantic
+
+    def _get_exact(self, key: str) -> Optional[str]:
+        row = self._connect().execute(
+            "SELECT response, expires_at FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None or (row[1] is not None and row[1] < time.time()):
+            return None
+        return row[0]
+
+    def get(self, key: str, semantic_text: Optional[str] = None, scope: Optional[str] = None) -> Optional[str]:
+        """
+        Return the cached response for key, or None on a miss. With semantic_text and
+        scope, also accept the response of a cached call in the same scope whose
+        semantic text is similar enough.
+        """
+        with self._lock:
+            response = self._get_exact(key)
+            if response is not None:
+                self.metrics["hits"] += 1
+                return response
+            semantic = self._semantic_index() if semantic_text is not None and scope is not None else None
+
+        # Embedding is the slow step, so it runs outside the lock and concurrent callers overlap
+        vector = semantic.embed(semantic_text) if semantic is not None else None
+        with self._lock:
+            if vector is not None:
+                match_key, score = semantic.search(scope, vector)
+                if match_key is not None and score >= self.semantic_threshold:
+                    response = self._get_exact(match_key)
+                    if response is not None:
+                        self.metrics["semantic_hits"] += 1
+                        return response
+
+            self.metrics["misses"] += 1
+            return None
+
+    def set(self, key: str, response: str, expire: Optional[int] = None,
+            semantic_text: Optional[str] = None, scope: Optional[str] = None) -> None:
+        """
+        Store a response, expiring after `expire` seconds (defaults to the cache TTL).
+        With semantic_text and scope, also index it for semantic lookups.
+        """
+        expire = self.ttl if expire is None else expire
+        expires_at = time.time() + expire if expire else None
+        semantic = None
+        if semantic_text is not None and scope is not None:
+            with self._lock:
+                semantic = self._semantic_index()
+        vector = semantic.embed(semantic_text) if semantic is not None else None
+
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, response, expires_at) VALUES (?, ?, ?)",
+                (key, response, expires_at),
+            )
+
+            if vector is not None:
+                conn.execute(
+                    "INSERT OR REPLACE INTO semantic_entries (key, scope, vector) VALUES (?, ?, ?)",
+                    (key, scope, vector),
+                )
+                semantic.add(scope, key, vector)
+            conn.commit()
+
+
+# Shared by every call_llm call, including the worker threads of call_llm_async
+llm_cache = LLMCache(cache_path, ttl=cache_ttl, semantic_threshold=semantic_threshold)
@@ -0,0 +1,20 @@
+import re
+
+# Prefer the libyaml C parser when PyYAML was built with it
+try:
+    from yaml import CSafeLoader as YamlLoader
+except ImportError:
+    from yaml import SafeLoader as YamlLoader
+
+# Extracts the body of the first ```yaml (or ```yml) fenced block in an LLM response
+YAML_FENCE = re.compile(r"```ya?ml\s*\n(.*?)```", re.DOTALL)
+
+
+def extract_yaml(response):
+    """Return the YAML block from an LLM response, or the whole response if there is no fence."""
+    match = YAML_FENCE.search(response)
+    return (match.group(1) if match else response).strip()
+
+
+if __name__ == "__main__":
+    print(extract_yaml("Here you go:\n```yaml\nkey: value\n```"))
@@ -0,0 +1,58 @@
+import json
+from array import array
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _default(obj):
+    """Serialize the non-JSON types that appear in structure analysis results."""
+    if isinstance(obj, (set, frozenset)):
+        try:
+            return sorted(obj)
+        except TypeError:
+            return sorted(obj, key=str)
+    if isinstance(obj, (array, bytearray)):
+        # Packed file_info columns
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _key(key) -> str:
+    """Render a dict key the way orjson's OPT_NON_STR_KEYS does."""
+    if isinstance(key, str):
+        return key
+    if key is None or isinstance(key, (bool, int, float)):
+        return json.dumps(key)
+    return str(key)
+
+
+def _stringify_keys(obj):
+    """Copy obj with every dict key as a string, so json can sort mixed-type keys."""
+    if isinstance(obj, dict):
+        return {_key(k): _stringify_keys(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_stringify_keys(v) for v in obj]
+    return obj
+
+
+def stable_json(obj) -> str:
+    """
+    Serialize obj as compact JSON with sorted keys, so equal inputs always produce
+    byte-identical text (unlike str() of dicts containing sets) without spending prompt
+    tokens on indentation. Uses orjson when available and falls back to the standard
+    library json module.
+    """
+    if orjson is not None:
+        return orjson.dumps(
+            obj,
+            default=_default,
+            option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS,
+        ).decode("utf-8")
+    return json.dumps(_stringify_keys(obj), default=_default, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    print(stable_json({"b": {"z", "a"}, "a": [1, 2], 3: None}))